@@ -1,16 +1,19 @@
 import asyncio as aio
+from collections.abc import Sequence
 from typing import TYPE_CHECKING
 
 import streamlit as st
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 from imagen.app.navbar import Page, nav
+from imagen.app.util import prepare_database
 from imagen.config import cfg
 from imagen.model.image import Image
+from imagen.service.image.thumbnail import get_thumbnail
 from imagen.utils.combine import combine_results
-from imagen.utils.file_utils import get_temp_file
+from imagen.vdb.hybrid_search import hybrid_search
 from imagen.vdb.image_search_helper import image_search
-from imagen.vdb.text_search import text_search
+from imagen.vdb.text_search import SearchMode, text_search
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -19,23 +22,24 @@ if TYPE_CHECKING:
 LIMIT = 10
 
 
-def search_response_adapter(res: list[Image]) -> None:
+def search_response_adapter(res: Sequence[Image]) -> None:
     for image in res:
         image_file: Path = cfg.image_path / image.name
         if image_file.exists():
             st.image(
-                image_file.as_posix(),
+                get_thumbnail(image_file, cfg.app_thumbnail_width).as_posix(),
                 caption=image.name,
                 use_container_width=True,
             )
             st.markdown(image.description)
             if image.distance is not None:
                 st.markdown(f"Distance: {image.distance}")
+            if image.score is not None:
+                st.markdown(f"Score: {image.score:.4f}")
 
 
-def streamlit_image_search(file: UploadedFile) -> list[Image]:
-    with get_temp_file(file.getbuffer(), delete=False) as tmp:
-        return image_search(tmp, LIMIT)
+def streamlit_image_search(file: UploadedFile) -> Sequence[Image]:
+    return aio.run(image_search(file.getvalue(), LIMIT))
 
 
 st.set_page_config(layout="wide")
@@ -43,6 +47,7 @@ st.header("Image Vector Search")
 
 # Display the menu
 nav(Page.HOME)
+prepare_database()
 
 st.markdown(
     """This form allows you to search for images based on an **uploaded image** or some **descriptive text**. You can also combine text and images to search the image you are looking for."""
@@ -53,6 +58,10 @@ with st.form(key="file_search_form"):
     uploaded_file = st.file_uploader("Choose a file", type=cfg.supported_file_formats)
     # Text input widget for search expression
     search_expression = st.text_area("Enter search expression", height=68)
+    # Fuse keyword and vector hits instead of ranking the vector hits alone
+    hybrid = st.checkbox("Hybrid search (keywords and vectors)", value=True)
+    # CLIP matches the text against the images directly, without calling the embedding service
+    mode = st.radio("Text matching", list(SearchMode), format_func=str.capitalize, horizontal=True)
 
     # Submit button for the form
     submit_button = st.form_submit_button(label="Search")
@@ -62,10 +71,16 @@ if submit_button:
     # Check if either the file is uploaded or the text area is filled
     if uploaded_file or search_expression:
         with st.spinner("Uploading file... Please wait."):
-            if uploaded_file and search_expression and len(search_expression) > 1:
+            if hybrid:
+                # Keyword, text and image retrieval fused by rank
+                image_bytes = uploaded_file.getvalue() if uploaded_file else None
+                search_response_adapter(
+                    aio.run(hybrid_search(search_expression or None, image_bytes, LIMIT, mode=mode))
+                )
+            elif uploaded_file and search_expression and len(search_expression) > 1:
                 # Mixed search
                 res_image = streamlit_image_search(uploaded_file)
-                res_text = aio.run(text_search(search_expression, LIMIT))
+                res_text = aio.run(text_search(search_expression, LIMIT, mode=mode))
                 search_response_adapter(combine_results(res_image, res_text, LIMIT // 2))
             elif uploaded_file:
                 # File based search
@@ -73,7 +88,7 @@ if submit_button:
                 search_response_adapter(res)
             elif search_expression:
                 # Text only search
-                res = aio.run(text_search(search_expression, LIMIT))
+                res = aio.run(text_search(search_expression, LIMIT, mode=mode))
                 search_response_adapter(res)
     else:
         # Display a message prompting the user to fill out at least one field
@@ -1,16 +1,45 @@
+import pandas as pd
 import streamlit as st
 
 from imagen.app.navbar import Page, nav
-from imagen.vdb.lancedb_info import get_data
+from imagen.app.util import prepare_database
+from imagen.model.image import FIELD
+from imagen.vdb.lancedb_info import SortField, get_data, table_version
+from imagen.vdb.lancedb_persistence import TBL
+
+PAGE_SIZES = (25, 50, 100, 250)
 
 st.set_page_config(layout="wide")
 st.header("Data")
 
 # Display the menu
 nav(Page.DATA)
+prepare_database()
+
+
+@st.cache_data(max_entries=64)
+def load_page(version: int, offset: int, limit: int, sort: SortField | None, descending: bool) -> pd.DataFrame:
+    """Load one page. The table version is part of the cache key, so new writes are picked up."""
+    return get_data(offset, limit, sort, descending, FIELD.info)
+
+
+@st.cache_data(max_entries=8)
+def count_rows(version: int) -> int:
+    return TBL.count_rows()
 
-image_metadata = get_data()
 
 st.markdown("""Here you can see data contained in this database.""")
 
+version = table_version()
+total = count_rows(version)
+columns = st.columns(4)
+sort = columns[0].selectbox("Sort by", [None, *SortField], format_func=lambda s: "Storage order" if s is None else s)
+descending = columns[1].toggle("Newest first", value=True, disabled=sort is None)
+page_size = columns[2].selectbox("Rows per page", PAGE_SIZES, index=1)
+pages = max(1, -(-total // page_size))
+page = columns[3].number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+
+image_metadata = load_page(version, (page - 1) * page_size, page_size, sort, descending)
+st.caption(f"{total} images, table version {version}")
+
 st.dataframe(image_metadata)
@@ -3,7 +3,12 @@ import asyncio
 import streamlit as st
 
 from imagen.app.navbar import Page, nav
-from imagen.app.util import display_image, missing_prompt_error, save_image
+from imagen.app.util import (
+    display_image,
+    missing_prompt_error,
+    prepare_database,
+    save_image,
+)
 from imagen.service.image.generate import Sizes, generate_image
 
 st.set_page_config(layout="wide")
@@ -11,6 +16,7 @@ st.header("Image Generation")
 
 # Display the menu
 nav(Page.GENERATE)
+prepare_database()
 
 st.markdown("Here you can generate images using DALL-E and save them directly in the vector database.")
 
@@ -1,6 +1,7 @@
 import streamlit as st
 
 from imagen.app.navbar import Page, nav
+from imagen.app.util import prepare_database
 from imagen.vdb.lancedb_info import basic_info, col_info
 
 st.set_page_config(layout="wide")
@@ -8,6 +9,7 @@ st.header("Database stats")
 
 # Display the menu
 nav(Page.STATS)
+prepare_database()
 
 count, _ = basic_info()
 column_info = col_info()
@@ -1,20 +1,21 @@
 import asyncio
-import shutil
 
 import streamlit as st
 
 from imagen.app.navbar import Page, nav
+from imagen.app.util import prepare_database
 from imagen.config import cfg
 from imagen.log import logger
-from imagen.utils.file_utils import get_temp_file
+from imagen.service.conversion_service import store_image_bytes
 from imagen.utils.time_utils import generate_file_timestamp
-from imagen.vdb.lancedb_persistence import save_image_from_path
+from imagen.vdb.lancedb_persistence import save_stored_image
 
 st.set_page_config(layout="wide")
 st.header("Image Upload")
 
 # Display the menu
 nav(Page.UPLOAD)
+prepare_database()
 
 st.markdown("""This page allows you to upload an image to the vector database.""")
 
@@ -31,15 +32,13 @@ if submit_button:
         st.error("Please upload an image")
     else:
         with st.spinner("Uploading file... Please wait."):
-            output = None
-            with get_temp_file(uploaded_file.getbuffer()) as tmp:
-                file_copy = tmp.parent / f"{generate_file_timestamp()}_{uploaded_file.name}"
-                logger.info("file_copy %s", file_copy)
-                shutil.copyfile(tmp, file_copy)
-                logger.info("file_copy exists %s", file_copy.exists())
-                output = asyncio.run(save_image_from_path(file_copy))
-
-                # if type(output) == Error:
-                #     st.error(f"Image upload failed due to {output.message}")
-                # else:
-                st.info(f"Image {uploaded_file.name} successfully {'created' if output else 'updated'}")
+            stored, digest = store_image_bytes(
+                uploaded_file.getbuffer(), f"{generate_file_timestamp()}_{uploaded_file.name}"
+            )
+            logger.info("Stored upload at %s", stored)
+            output = asyncio.run(save_stored_image(stored, digest))
+
+            # if type(output) == Error:
+            #     st.error(f"Image upload failed due to {output.message}")
+            # else:
+            st.info(f"Image {uploaded_file.name} successfully {'created' if output else 'updated'}")
@@ -5,7 +5,13 @@ import streamlit as st
 
 from imagen.log import logger
 from imagen.utils.file_utils import unlink_file
-from imagen.vdb.lancedb_persistence import save_image_from_path
+from imagen.vdb.lancedb_persistence import prepare_table, save_image_from_path
+
+
+@st.cache_resource
+def prepare_database() -> None:
+    """Bring the table up to date once per Streamlit process."""
+    prepare_table()
 
 
 def missing_prompt_error() -> None:
@@ -1,50 +1,94 @@
 """Command line interface for the database."""
 
 import asyncio as aio
-from enum import StrEnum
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Annotated
+from typing import Annotated
 
 import typer
 
 from imagen.config import cfg
 from imagen.log import logger
-
-if TYPE_CHECKING:
-    import pandas as pd
+from imagen.utils.http_client import http_session
 
 app = typer.Typer()
 
 
+@app.callback()
+def main() -> None:
+    """Manage the image database."""
+    from imagen.vdb.lancedb_persistence import prepare_table
+
+    prepare_table()
+
+
 @app.command()
 def init(
     path: Annotated[
         Path,
         typer.Option(exists=True, help="Can supply a non-default image location"),
     ] = cfg.image_load_path,
+    batch_size: Annotated[int, typer.Option(help="Images per CLIP forward pass")] = cfg.clip_batch_size,
+    describe_workers: Annotated[
+        int, typer.Option(help="Concurrent llava description requests")
+    ] = cfg.ingest_describe_workers,
+    text_workers: Annotated[int, typer.Option(help="Concurrent text embedding requests")] = cfg.ingest_text_workers,
+    force: Annotated[bool, typer.Option(help="Reprocess files the ingest manifest records as done")] = False,
 ) -> None:
     """Initialize the database."""
-    from imagen.service.conversion_service import image_embeddings
-    from imagen.vdb.lancedb_persistence import TBL, save_image
+    from imagen.service.image.executor import shutdown_executor
+    from imagen.service.ingest import IngestPipeline
+    from imagen.service.manifest import IngestManifest
+    from imagen.vdb.lancedb_persistence import TBL, image_exists, save_image
+    from imagen.vdb.vector_index import rebuild_stale_indexes
+    from imagen.vdb.write_buffer import WriteBuffer
 
-    async def load_images() -> None:
-        async for image_data in image_embeddings(path):
-            if image_data is None:
+    async def load_images(buffer: WriteBuffer, manifest: IngestManifest) -> None:
+        pipeline = IngestPipeline(
+            partial(save_image, buffer=buffer),
+            exists=partial(image_exists, buffer=buffer),
+            manifest=manifest,
+            resume=not force,
+            batch_size=batch_size,
+            describe_workers=describe_workers,
+            text_workers=text_workers,
+        )
+        async with http_session():
+            if not await pipeline.run(sorted(path.glob("*.png"))):
                 logger.error("Could not process any images")
-                return
-            save_image(image_data)
 
-    aio.run(load_images())
+    try:
+        with IngestManifest() as manifest:
+            with WriteBuffer(on_flush=lambda rows: manifest.mark_stored(row.name for row in rows)) as buffer:
+                aio.run(load_images(buffer, manifest))
+            print("Ingest manifest", manifest.summary())
+    finally:
+        shutdown_executor()
+    rebuild_stale_indexes()
     print(f"Table {TBL} has {TBL.count_rows()} rows.")
 
 
 @app.command()
 def add(path: Annotated[Path, typer.Option(exists=True, help="Image path to add")]) -> None:
     """Add an image to the database."""
+    from imagen.service.manifest import IngestManifest, IngestStatus
     from imagen.vdb.lancedb_persistence import save_image_from_path
 
-    print("Processing", path)
-    aio.run(save_image_from_path(path))
+    async def add_image() -> None:
+        async with http_session():
+            await save_image_from_path(path)
+
+    with IngestManifest() as manifest:
+        if manifest.is_done(path):
+            print("Already ingested", path)
+            return
+        print("Processing", path)
+        try:
+            aio.run(add_image())
+        except Exception as exc:
+            manifest.record(path, IngestStatus.FAILED, error=f"{type(exc).__name__}: {exc}")
+            raise
+        manifest.record(path, IngestStatus.DONE)
 
 
 @app.command()
@@ -57,31 +101,172 @@ def count() -> None:
     print("Columns", names)
 
 
-class FileFormats(StrEnum):
-    """Supported file formats."""
+@app.command()
+def build_index(
+    metric: Annotated[str, typer.Option(help="Distance metric: l2, cosine or dot")] = cfg.vector_index_metric,
+    index_type: Annotated[str, typer.Option(help="IVF_PQ, IVF_HNSW_PQ or IVF_HNSW_SQ")] = cfg.vector_index_type,
+) -> None:
+    """Build or rebuild the ANN indexes on both vector columns."""
+    from imagen.vdb.vector_index import build_vector_indexes
+
+    built = build_vector_indexes(metric, index_type)
+    print("Indexed columns", built or "none, the table is too small")
+
 
-    CSV = "csv"
-    JSON = "json"
+@app.command()
+def index_info() -> None:
+    """Show the ANN index state of both vector columns."""
+    from imagen.vdb.vector_index import vector_index_info
+
+    for info in vector_index_info():
+        print(", ".join(f"{key}={value}" for key, value in info.items()))
 
 
 @app.command()
-def export(fmt: Annotated[FileFormats, typer.Option(help="Output file format")] = FileFormats.JSON) -> None:
-    """Export image data to CSV."""
-    from imagen.vdb.lancedb_persistence import TBL
+def optimize(
+    retention_days: Annotated[
+        float, typer.Option(help="Keep table versions newer than this many days")
+    ] = cfg.maintenance_retention_days,
+    indexes: Annotated[bool, typer.Option(help="Refresh the vector and full-text indexes")] = True,
+) -> None:
+    """Compact fragments, delete old table versions and refresh indexes."""
+    from datetime import timedelta
+
+    from imagen.vdb.maintenance import optimize_table
+
+    report = optimize_table(timedelta(days=retention_days), indexes)
+    for label, stats in (("Before", report.before), ("After", report.after)):
+        print(f"{label}:", stats)
+    print(
+        f"Removed {report.fragments_removed} fragments, added {report.fragments_added}, "
+        f"deleted {report.versions_removed} versions ({report.bytes_removed} bytes)"
+    )
+    print("Rebuilt indexes", report.indexes_rebuilt or "none")
+    print("Timings", ", ".join(f"{step}={seconds:.2f}s" for step, seconds in report.timings.items()))
+
+
+@app.command()
+def compact_vectors(
+    drop: Annotated[bool, typer.Option(help="Drop the float16 columns instead of adding them")] = False,
+    batch_size: Annotated[int, typer.Option(help="Rows per converted batch")] = cfg.transfer_batch_size,
+    index: Annotated[bool, typer.Option(help="Build ANN indexes on the new columns")] = True,
+) -> None:
+    """Add float16 copies of the vector columns, searched first when COMPACT_VECTORS is set."""
+    from imagen.vdb.compact_vectors import drop_compact_vectors, migrate_compact_vectors
+
+    if drop:
+        print("Dropped columns", drop_compact_vectors() or "none")
+        return
+    print("Added columns", migrate_compact_vectors(batch_size, index) or "none, they already exist")
+
+
+@app.command()
+def benchmark_vectors(
+    queries: Annotated[int, typer.Option(help="Number of sampled queries")] = 100,
+    limit: Annotated[int, typer.Option(help="Results per query, recall is measured at this depth")] = 10,
+    column: Annotated[str, typer.Option(help="Vector column to search")] = "image_vector",
+    distance: Annotated[str, typer.Option(help="Distance metric: l2, cosine or dot")] = "l2",
+    rerank_factor: Annotated[
+        int, typer.Option(help="Candidates per result for the rerank")
+    ] = cfg.compact_rerank_factor,
+) -> None:
+    """Compare recall and latency of float32 search against float16 search with and without rerank."""
+    from imagen.vdb.compact_vectors import benchmark_compact_search
 
-    df: pd.DataFrame = TBL.to_pandas()
-    if fmt == FileFormats.CSV:
-        df.to_csv("image_data.csv")
-    else:
-        df.to_json("image_data.json")
+    print(f"{'mode':<22} {'recall':>7} {'mean ms':>9} {'p95 ms':>9} {'bytes/vec':>10}")
+    for result in benchmark_compact_search(queries, limit, column, distance, rerank_factor):
+        print(
+            f"{result.mode:<22} {result.recall:>7.3f} {result.mean_ms:>9.2f} "
+            f"{result.p95_ms:>9.2f} {result.bytes_per_vector:>10}"
+        )
 
 
 @app.command()
-def clean() -> None:
+def reembed_text(
+    batch_size: Annotated[int, typer.Option(help="Descriptions per embedding batch")] = cfg.upsert_batch_size,
+) -> None:
+    """Embed all descriptions again, e.g. text vectors stored from the unnormalized Ollama endpoint."""
+    from imagen.vdb.reembed import reembed_text_vectors
+
+    async def reembed() -> int:
+        async with http_session():
+            return await reembed_text_vectors(batch_size)
+
+    print(f"Updated {aio.run(reembed())} text vectors")
+
+
+@app.command()
+def thumbnails(
+    width: Annotated[list[int] | None, typer.Option(help="Widths to generate, defaults to all configured")] = None,
+    fmt: Annotated[str, typer.Option(help="webp or jpeg")] = "webp",
+) -> None:
+    """Pre-generate resized derivatives of every stored image."""
+    from imagen.service.image.thumbnail import ThumbnailFormat, generate_thumbnails
+
+    count = generate_thumbnails(tuple(width or cfg.thumbnail_widths), ThumbnailFormat(fmt))
+    print(f"Generated thumbnails for {count} images in {cfg.thumbnail_path}")
+
+
+@app.command()
+def export(
+    path: Annotated[Path, typer.Option(help="Output file, the format is taken from its suffix")] = Path(
+        "image_data.parquet"
+    ),
+    fmt: Annotated[str | None, typer.Option(help="parquet, arrow or ndjson")] = None,
+    columns: Annotated[list[str] | None, typer.Option("--column", help="Columns to export, defaults to all")] = None,
+    batch_size: Annotated[int, typer.Option(help="Rows per record batch")] = cfg.transfer_batch_size,
+) -> None:
+    """Stream image data to a Parquet, Arrow IPC or NDJSON file.
+
+    CSV export was removed: it cannot hold the vector columns, use NDJSON for a text format.
+    """
+    from imagen.vdb.transfer import FileFormat, export_table, unknown_columns
+
+    try:
+        file_format = FileFormat(fmt) if fmt else FileFormat.from_path(path)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--fmt/--path") from None
+    if file_format == FileFormat.JSON:
+        msg = "The pandas JSON layout can only be imported, use parquet, arrow or ndjson"
+        raise typer.BadParameter(msg, param_hint="--fmt")
+    if unknown := unknown_columns(columns or ()):
+        raise typer.BadParameter(f"Unknown columns {', '.join(unknown)}", param_hint="--column")
+    rows = export_table(path, file_format, columns, batch_size)
+    print(f"Exported {rows} rows to {path}")
+
+
+@app.command("import")
+def import_(
+    path: Annotated[Path, typer.Option(exists=True, help="Parquet, Arrow IPC, NDJSON or pandas JSON export")],
+    fmt: Annotated[str | None, typer.Option(help="parquet, arrow, ndjson or json")] = None,
+    batch_size: Annotated[int, typer.Option(help="Rows per record batch")] = cfg.transfer_batch_size,
+    replace: Annotated[bool, typer.Option(help="Delete all rows before importing")] = False,
+    upsert: Annotated[bool, typer.Option(help="Overwrite rows with the same name instead of skipping them")] = False,
+) -> None:
+    """Bulk load exported image data without describing or embedding the images again."""
+    from imagen.vdb.transfer import FileFormat, import_table
+
+    added, skipped = import_table(path, FileFormat(fmt) if fmt else None, batch_size, replace, upsert)
+    print(f"Imported {added} rows from {path}, skipped {skipped} already stored")
+
+
+@app.command()
+def clean(
+    dry_run: Annotated[bool, typer.Option(help="Only report what would be removed")] = False,
+    verbose: Annotated[bool, typer.Option(help="List every affected file and row")] = False,
+) -> None:
     """Cleanup images and database."""
     from imagen.vdb.synchronize_images import syncronize_db
 
-    syncronize_db()
+    report = syncronize_db(dry_run)
+    if verbose:
+        for name in report.orphan_files:
+            print("File without row:", name)
+        for name in report.missing_files:
+            print("Row without file:", name)
+    print(f"{len(report.orphan_files)} files without a row, {len(report.missing_files)} rows without a file")
+    if not dry_run:
+        print(f"Removed {report.files_removed} files and deleted {report.rows_deleted} rows")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 """Configuration file for the project."""
 
 from collections.abc import Callable
+from enum import StrEnum
 from pathlib import Path
 from typing import Self
 
@@ -22,6 +23,13 @@ def default_dir(path_str: str) -> Callable[[], Path]:
     return default_dir_factory
 
 
+class ExecutorKind(StrEnum):
+    """Worker pool types for model inference."""
+
+    THREAD = "thread"
+    PROCESS = "process"
+
+
 class Config(BaseSettings):
     """Configuration object for the project."""
 
@@ -29,9 +37,24 @@ class Config(BaseSettings):
     image_path: DirectoryPath = Field(default_factory=default_dir("./tmp/images"))
     # Where imagen will look to load test images
     image_load_path: DirectoryPath = Field(default_factory=default_dir("./tests/data/images"))
+    # Where imagen will cache resized derivatives of the stored images
+    thumbnail_path: DirectoryPath = Field(default_factory=default_dir("./tmp/thumbnails"))
+    thumbnail_widths: tuple[int, ...] = (128, 256, 512, 1024)
+    thumbnail_quality: int = 80
+    # Width of the result images shown by the Streamlit app
+    app_thumbnail_width: int = 512
+    # Uploads are streamed to storage in chunks of this many bytes, up to a maximum size
+    upload_chunk_size: int = 1024 * 1024
+    max_upload_size: int = 50 * 1024 * 1024
+    # Seconds browsers may cache served images
+    image_cache_max_age: int = 86_400
 
     openai_api_key: str = ""
     openai_embeddings_model: str | None = None
+    # Concurrent OpenAI requests per event loop, and per-request timeout in seconds
+    openai_max_concurrency: int = 8
+    openai_timeout: float = 30.0
+    openai_max_retries: int = 2
     # openai_image_model: str = "clip-vit-base"
 
     ollama_base_url: HttpUrl = "http://localhost:11434/api"  # type: ignore
@@ -44,6 +67,90 @@ class Config(BaseSettings):
     image_vector_size: int = 768
     text_vector_size: int = 768
 
+    clip_model: str = "ViT-L/14"
+    # Inferences run per modality at server startup to compile the JIT
+    warm_up_iterations: int = 2
+    # Shared HTTP client used for Ollama and image downloads
+    http_limit: int = 100
+    http_limit_per_host: int = 16
+    http_keepalive_timeout: float = 30.0
+    http_dns_cache_ttl: int = 300
+    http_connect_timeout: float = 10.0
+    http_timeout: float = 300.0
+
+    # Rows gathered before a LanceDB write, and the longest a row may wait to be written
+    write_buffer_rows: int = 1000
+    write_buffer_seconds: float = 5.0
+
+    # ANN vector indexes: built once the table has enough rows to train them,
+    # and rebuilt when this many rows have been added since the last build
+    vector_index_type: str = "IVF_PQ"
+    vector_index_metric: str = "l2"
+    vector_index_min_rows: int = 10_000
+    vector_index_rebuild_rows: int = 50_000
+    # Default ANN search parameters. Higher values trade latency for recall
+    search_nprobes: int = 20
+    search_refine_factor: int | None = None
+    # Rebuild the full-text index on descriptions once this many rows are unindexed
+    fts_index_rebuild_rows: int = 10_000
+    # Hybrid search: candidates pulled per retriever, the reciprocal rank fusion constant and per retriever weights
+    hybrid_candidates: int = 50
+    hybrid_rrf_k: int = 60
+    hybrid_fts_weight: float = 1.0
+    hybrid_text_weight: float = 1.0
+    hybrid_image_weight: float = 1.0
+    # Table maintenance: seconds between background optimize runs in the server (None disables them)
+    # and how many days of old table versions to keep
+    maintenance_interval: float | None = None
+    maintenance_retention_days: float = 7.0
+    # Rows per record batch when exporting and importing the table, and per merge_insert when upserting
+    transfer_batch_size: int = 10_000
+    upsert_batch_size: int = 1000
+    # Synchronization: names per batched delete, and how recent files must be to be left alone
+    sync_delete_batch_size: int = 1000
+    sync_grace_seconds: float = 300.0
+    # Search the float16 copies of the vector columns first, then rerank this many candidates per result
+    # exactly with the float32 vectors. The copies are created with the compact-vectors command
+    compact_vectors: bool = False
+    compact_rerank_factor: int = 4
+    # Batch search: most queries per request and how many vector searches run in parallel
+    search_batch_max_queries: int = 100
+    search_batch_workers: int = 8
+
+    # Query embedding cache: entries and seconds kept in memory, plus an optional
+    # SQLite file so the cache survives restarts
+    embedding_cache_size: int = 10_000
+    embedding_cache_ttl: float = 7 * 24 * 3600
+    embedding_cache_path: Path | None = None
+    embedding_cache_disk_size: int = 1_000_000
+
+    # Text embedding batches: texts and approximate tokens per request
+    text_embed_batch_size: int = 256
+    text_embed_batch_tokens: int = 100_000
+
+    # Number of images per CLIP forward pass
+    clip_batch_size: int = 16
+    # CLIP text queries per forward pass, and how long a query waits for others to share its batch
+    clip_text_batch_size: int = 64
+    clip_text_batch_wait: float = 0.005
+
+    # Concurrent ingestion pipeline: queue size between stages and workers per stage
+    ingest_queue_size: int = 64
+    ingest_copy_workers: int = 2
+    ingest_describe_workers: int = 4
+    ingest_text_workers: int = 4
+    # Seconds the CLIP stage waits to fill a batch before running a partial one
+    ingest_batch_timeout: float = 1.0
+    # Seconds between progress reports
+    ingest_report_interval: float = 10.0
+    # SQLite manifest of ingested files. Defaults to a file next to the database
+    ingest_manifest_path: Path | None = None
+    # Worker pool used by the server for CLIP inference
+    inference_executor: ExecutorKind = ExecutorKind.THREAD
+    inference_workers: int = 1
+    # Maximum CLIP calls running or waiting before new ones are rejected
+    inference_queue_size: int = 32
+
     supported_file_formats: tuple[str, ...] = (
         "png",
         "jpg",
@@ -1,7 +1,8 @@
 import datetime as dt
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
 from pathlib import Path
-from typing import ClassVar, Self
+from typing import Any, ClassVar, Self, overload
 
 import numpy as np
 import pyarrow as pa
@@ -19,6 +20,7 @@ class ImageFields:
     text_vector = "text_vector"
     created = "created"
     updated = "updated"
+    digest = "digest"
 
     @property
     def all(self) -> list[str]:
@@ -29,8 +31,17 @@ class ImageFields:
             self.text_vector,
             self.created,
             self.updated,
+            self.digest,
         ]
 
+    @property
+    def vectors(self) -> list[str]:
+        return [self.image_vector, self.text_vector]
+
+    def compact(self, column: str) -> str:
+        """Name of the optional float16 copy of a vector column."""
+        return f"{column}_f16"
+
     @property
     def info(self) -> list[str]:
         return [
@@ -50,27 +61,62 @@ SCHEMA = pa.schema(
         pa.field(FIELD.text_vector, pa.list_(pa.float32(), cfg.text_vector_size)),
         pa.field(FIELD.created, pa.timestamp("ms")),
         pa.field(FIELD.updated, pa.timestamp("ms")),
+        # SHA-256 of the original file bytes
+        pa.field(FIELD.digest, pa.string()),
     ]
 )
 
 
-@dataclass
+def _vector_array(vectors: Iterable[np.ndarray], size: int) -> pa.FixedSizeListArray:
+    """Pack vectors into one Arrow array through a single contiguous float32 buffer."""
+    rows = list(vectors)
+    matrix = np.stack(rows) if rows else np.empty((0, size), np.float32)
+    if matrix.ndim != 2 or matrix.shape[1] != size:
+        msg = f"Expected vectors of size {size}, got shape {matrix.shape}"
+        raise ValueError(msg)
+    return pa.FixedSizeListArray.from_arrays(pa.array(matrix.astype(np.float32, copy=False).ravel()), size)
+
+
+def to_float16(array: pa.FixedSizeListArray | pa.ChunkedArray) -> pa.FixedSizeListArray:
+    """Convert a float32 vector column to float16, halving its size."""
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    size = array.type.list_size
+    values = array.flatten().to_numpy().astype(np.float16)
+    return pa.FixedSizeListArray.from_arrays(pa.array(values), size)
+
+
+def with_compact_vectors(table: pa.Table) -> pa.Table:
+    """Append the float16 copies of the vector columns to a table of image rows."""
+    for column in FIELD.vectors:
+        table = table.append_column(FIELD.compact(column), to_float16(table.column(column)))
+    return table
+
+
+@dataclass(slots=True)
 class Image:
-    """Image data object."""
+    """Image data object. Embeddings are float32 NumPy arrays."""
 
     name: str
     description: str
-    image_embedding: list[float]
-    text_embedding: list[float]
+    image_embedding: np.ndarray
+    text_embedding: np.ndarray
 
     image_path: Path | None = None
     created: int | None = None
     updated: int | None = None
     distance: float | None = None
+    digest: str | None = None
+    score: float | None = None
 
     field: ClassVar[ImageFields] = FIELD
     schema: ClassVar[pa.Schema] = SCHEMA
 
+    def __post_init__(self) -> None:
+        # Lists from JSON APIs are converted once, float32 arrays and Arrow views are kept as they are
+        self.image_embedding = np.asarray(self.image_embedding, dtype=np.float32)
+        self.text_embedding = np.asarray(self.text_embedding, dtype=np.float32)
+
     @classmethod
     def from_vdb(cls, data: dict) -> Self:
         """Create an image object from a database entry."""
@@ -81,26 +127,103 @@ class Image:
             text_embedding=data[FIELD.text_vector],
             created=data[FIELD.created],
             updated=data[FIELD.updated],
+            digest=data.get(FIELD.digest),
+            distance=data.get("_distance"),
+            score=data.get("_score"),
         )
 
     def to_pyarrow(self, create_timestamp: int | None = None) -> pa.lib.Table:
         """Convert the image object to a pyarrow table."""
+        table = self.batch_to_pyarrow([self])
+        if create_timestamp:
+            index = table.schema.get_field_index(FIELD.created)
+            table = table.set_column(index, SCHEMA.field(index), pa.array([create_timestamp], pa.timestamp("ms")))
+        return table
+
+    @classmethod
+    def batch_to_pyarrow(cls, images: Sequence["Image"]) -> pa.lib.Table:
+        """Convert many image objects to a single pyarrow table."""
         current_timestamp = int(dt.datetime.now(dt.UTC).timestamp() * 1_000)
         elements = [
-            pa.array([self.name]),
-            pa.array([self.description]),
-            pa.array([self.image_embedding], pa.list_(pa.float32(), cfg.image_vector_size)),
-            pa.array([self.text_embedding], pa.list_(pa.float32(), cfg.text_vector_size)),
+            pa.array([image.name for image in images], pa.string()),
+            pa.array([image.description for image in images], pa.string()),
+            _vector_array((image.image_embedding for image in images), cfg.image_vector_size),
+            _vector_array((image.text_embedding for image in images), cfg.text_vector_size),
+            pa.array([image.created or current_timestamp for image in images], pa.timestamp("ms")),
+            pa.array([current_timestamp] * len(images), pa.timestamp("ms")),
+            pa.array([image.digest for image in images], pa.string()),
         ]
-
-        if create_timestamp:
-            elements.append(pa.array([create_timestamp]))
-        else:
-            elements.append(pa.array([current_timestamp]))
-        elements.append(pa.array([current_timestamp]))
-
-        return pa.Table.from_arrays(elements, FIELD.all)  # type: ignore
+        return pa.Table.from_arrays(elements, schema=SCHEMA)
 
     def matching_vector(self, image: "Image") -> bool:
         """Check if the image vectors match."""
         return np.array_equal(self.image_embedding, image.image_embedding)
+
+
+class ImageResults(Sequence[Image]):
+    """Search results backed by the Arrow table LanceDB returned.
+
+    Rows become Image objects on first access, and their embeddings are read-only views into the
+    Arrow buffers, so no vector is copied or boxed.
+    """
+
+    __slots__ = ("_images", "_table", "_vectors")
+
+    def __init__(self, table: pa.Table) -> None:
+        self._table = table.combine_chunks()
+        self._images: list[Image | None] = [None] * table.num_rows
+        self._vectors: dict[str, np.ndarray] = {}
+
+    @property
+    def table(self) -> pa.Table:
+        return self._table
+
+    def __len__(self) -> int:
+        return self._table.num_rows
+
+    @overload
+    def __getitem__(self, index: int) -> Image: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Image]: ...
+
+    def __getitem__(self, index: int | slice) -> Image | list[Image]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if (image := self._images[index]) is None:
+            image = self._images[index] = self._image(index)
+        return image
+
+    def __repr__(self) -> str:
+        return f"ImageResults({len(self)} rows)"
+
+    def column(self, name: str) -> list[Any]:
+        """Read one scalar column for all rows, without materializing images."""
+        return self._table.column(name).to_pylist() if name in self._table.column_names else [None] * len(self)
+
+    def vectors(self, name: str) -> np.ndarray:
+        """Return a vector column as a read-only float32 matrix that shares the Arrow buffer."""
+        if (matrix := self._vectors.get(name)) is None:
+            array = self._table.column(name).chunk(0) if self._table.num_rows else None
+            size = self._table.schema.field(name).type.list_size
+            values = array.flatten().to_numpy() if array is not None else np.empty(0, np.float32)
+            matrix = self._vectors[name] = values.reshape(-1, size)
+        return matrix
+
+    def _value(self, name: str, index: int) -> Any:
+        return self._table.column(name)[index].as_py() if name in self._table.column_names else None
+
+    def _image(self, index: int) -> Image:
+        return Image(
+            name=self._value(FIELD.name, index),
+            description=self._value(FIELD.description, index),
+            image_embedding=self.vectors(FIELD.image_vector)[index],
+            text_embedding=self.vectors(FIELD.text_vector)[index],
+            created=self._value(FIELD.created, index),
+            updated=self._value(FIELD.updated, index),
+            digest=self._value(FIELD.digest, index),
+            distance=self._value("_distance", index),
+            score=self._value("_score", index),
+        )
@@ -1,5 +1,48 @@
 """"""
 
-from fastapi import FastAPI
+import asyncio as aio
+import contextlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="imagen backend")
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from imagen.config import cfg
+from imagen.server.startup import Readiness, startup
+from imagen.service.image.executor import InferenceQueueFull, shutdown_executor
+from imagen.utils.http_client import http_session
+from imagen.vdb.maintenance import run_maintenance
+from imagen.vdb.write_buffer import WriteBuffer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Manage server-wide resources.
+
+    Startup runs in the background so the readiness endpoint can answer while the model warms up.
+    """
+    app.state.readiness = Readiness()
+    app.state.write_buffer = WriteBuffer(background=True)
+    startup_task = aio.create_task(startup(app.state.readiness))
+    flusher_task = aio.create_task(app.state.write_buffer.run_flusher())
+    tasks = [startup_task, flusher_task]
+    if cfg.maintenance_interval:
+        tasks.append(aio.create_task(run_maintenance(cfg.maintenance_interval, app.state.write_buffer)))
+    async with http_session():
+        yield
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(aio.CancelledError, Exception):
+            await task
+    app.state.write_buffer.flush()
+    shutdown_executor()
+
+
+app = FastAPI(title="imagen backend", lifespan=lifespan)
+
+
+@app.exception_handler(InferenceQueueFull)
+async def inference_queue_full(_: Request, exc: InferenceQueueFull) -> JSONResponse:
+    """Tell clients to back off while the inference pool is saturated."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
@@ -1,7 +1,9 @@
 """"""
 
 from imagen.server.app import app
-from imagen.server.routes import image, search
+from imagen.server.routes import health, image, images, search
 
+app.include_router(health.router)
 app.include_router(image.router)
+app.include_router(images.router)
 app.include_router(search.router)
@@ -1,10 +1,14 @@
 """Model classes for the image search service."""
 
-from typing import Self
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Self
 
 from pydantic import BaseModel, Field
 
+from imagen.config import cfg
 from imagen.model.image import Image
+from imagen.vdb.text_search import SearchMode
 
 
 class SearchRequest(BaseModel):
@@ -12,6 +16,27 @@ class SearchRequest(BaseModel):
 
     search: str = Field(..., description="The search expression")
     limit: int = Field(default=10, description="The amount of results")
+    nprobes: int | None = Field(default=None, description="ANN partitions to probe")
+    refine_factor: int | None = Field(default=None, description="ANN candidates to re-rank, as a multiple of limit")
+    mode: SearchMode = Field(
+        default=SearchMode.DESCRIPTION,
+        description="Match descriptions, or match images directly with a local CLIP text encoding",
+    )
+
+
+class BatchSearchRequest(BaseModel):
+    """Batch search request payload."""
+
+    searches: list[str] = Field(
+        ..., min_length=1, max_length=cfg.search_batch_max_queries, description="The search expressions"
+    )
+    limit: int = Field(default=10, description="The amount of results per search")
+    nprobes: int | None = Field(default=None, description="ANN partitions to probe")
+    refine_factor: int | None = Field(default=None, description="ANN candidates to re-rank, as a multiple of limit")
+    mode: SearchMode = Field(
+        default=SearchMode.DESCRIPTION,
+        description="Match descriptions, or match images directly with a local CLIP text encoding",
+    )
 
 
 class SearchResponse(BaseModel):
@@ -20,7 +45,9 @@ class SearchResponse(BaseModel):
     name: str = Field(..., description="The image name")
     description: str = Field(..., description="The image description")
     url: str = Field(..., description="The image URL")
-    distance: float = Field(..., description="The distance to the search query")
+    thumbnail_url: str = Field(..., description="The URL of a resized derivative of the image")
+    distance: float | None = Field(default=None, description="The distance to the search query")
+    score: float | None = Field(default=None, description="The relevance score of keyword and hybrid searches")
 
     @classmethod
     def from_image(cls, image: Image) -> Self:
@@ -29,15 +56,53 @@ class SearchResponse(BaseModel):
             name=image.name,
             description=image.description,
             url=f"/image/{image.name}",
+            thumbnail_url=f"/image/{image.name}?w={cfg.app_thumbnail_width}",
             distance=image.distance,
+            score=image.score,
         )
 
     @classmethod
-    def from_images(cls, images: list[Image]) -> list["SearchResponse"]:
+    def from_images(cls, images: Sequence[Image]) -> list["SearchResponse"]:
         """Convert search results to SearchResponse objects."""
         return [cls.from_image(image) for image in images]
 
 
+class BatchSearchResponse(BaseModel):
+    """Results of one search in a batch."""
+
+    search: str = Field(..., description="The search expression")
+    results: list[SearchResponse] = Field(..., description="The results for this search")
+
+
+class ImageInfo(BaseModel):
+    """Listed image metadata."""
+
+    name: str = Field(..., description="The image name")
+    description: str = Field(..., description="The image description")
+    created: datetime | None = Field(default=None, description="When the image was added")
+    updated: datetime | None = Field(default=None, description="When the image was last updated")
+    url: str = Field(..., description="The image URL")
+    thumbnail_url: str = Field(..., description="The URL of a resized derivative of the image")
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> Self:
+        """Convert a table row to an ImageInfo object."""
+        return cls(
+            **row,
+            url=f"/image/{row['name']}",
+            thumbnail_url=f"/image/{row['name']}?w={cfg.app_thumbnail_width}",
+        )
+
+
+class ImagePage(BaseModel):
+    """One page of the image listing."""
+
+    total: int = Field(..., description="The amount of images in the database")
+    offset: int = Field(..., description="The position of the first listed image")
+    limit: int = Field(..., description="The maximum amount of listed images")
+    images: list[ImageInfo] = Field(..., description="The listed images")
+
+
 class UploadResponse(BaseModel):
     """Upload response payload."""
 
@@ -0,0 +1,23 @@
+"""Health check routes for the API."""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from imagen.server.startup import Readiness
+from imagen.service.cache import cache_stats
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/ready")
+async def ready(request: Request) -> JSONResponse:
+    """Report ready only once the model is warm and the database is open."""
+    readiness: Readiness = request.app.state.readiness
+    content = {"ready": readiness.ready, "error": readiness.error, "timings": readiness.timings}
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=content)
+
+
+@router.get("/caches")
+async def caches() -> dict[str, dict[str, int]]:
+    """Hit, miss and eviction counters of the embedding caches."""
+    return cache_stats()
@@ -1,34 +1,78 @@
 """Image processing routes for the API."""
 
-import shutil
+import asyncio as aio
+from collections.abc import AsyncIterator
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, File, HTTPException, Query, Request, Response, UploadFile
 from fastapi.responses import FileResponse
 
 from imagen.config import cfg
 from imagen.server.model import UploadResponse
-from imagen.utils.file_utils import get_temp_file
+from imagen.service.conversion_service import store_image_stream
+from imagen.service.image.thumbnail import MEDIA_TYPES, ThumbnailFormat, get_thumbnail
 from imagen.utils.time_utils import generate_file_timestamp
-from imagen.vdb.lancedb_persistence import save_image_from_path
+from imagen.vdb.lancedb_persistence import save_stored_image
 
 router = APIRouter(prefix="/image", tags=["image"])
 
 
 @router.post("/")
-async def create_upload_file(file: UploadFile = File(...)) -> UploadResponse:  # noqa: B008
-    """Upload an image file to the server."""
-    with get_temp_file(await file.read()) as tmp:
-        formatted_timestamp = generate_file_timestamp()
-        file_copy = tmp.parent / f"{formatted_timestamp}_{file.filename}"
-        shutil.copyfile(tmp, file_copy)
-        output = await save_image_from_path(file_copy)
+async def create_upload_file(request: Request, file: UploadFile = File(...)) -> UploadResponse:  # noqa: B008
+    """Upload an image file to the server.
 
-    return UploadResponse(name=file.filename or "upload", path=tmp.as_posix(), output=output)
+    The upload is streamed in chunks straight to its storage path and hashed on the way.
+    """
+
+    async def chunks() -> AsyncIterator[bytes]:
+        size = 0
+        while chunk := await file.read(cfg.upload_chunk_size):
+            size += len(chunk)
+            if size > cfg.max_upload_size:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {cfg.max_upload_size} bytes")
+            yield chunk
+
+    name = file.filename or "upload"
+    path, digest = await store_image_stream(chunks(), f"{generate_file_timestamp()}_{name}")
+    output = await save_stored_image(path, digest, request.app.state.write_buffer)
+    return UploadResponse(name=name, path=path.as_posix(), output=output)
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Check the conditional request headers against the file's validators."""
+    if if_none_match := request.headers.get("if-none-match"):
+        return etag in {tag.strip() for tag in if_none_match.split(",")} or if_none_match.strip() == "*"
+    if if_modified_since := request.headers.get("if-modified-since"):
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _cached_file_response(request: Request, path: Path, media_type: str | None = None) -> Response:
+    """Serve a file with validators and cache headers, answering 304 when the client copy is current."""
+    stat = path.stat()
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": f"public, max-age={cfg.image_cache_max_age}",
+    }
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
 
 
 @router.get("/{image_name}")
-async def get_image(image_name: str) -> FileResponse:
-    """Get an image by name."""
+async def get_image(
+    request: Request,
+    image_name: str,
+    w: int | None = Query(default=None, gt=0, description="Width of a resized derivative"),
+    fmt: ThumbnailFormat = Query(default=ThumbnailFormat.WEBP, description="Format of a resized derivative"),  # noqa: B008
+) -> Response:
+    """Get an image by name, or a resized derivative of it when a width is given."""
     # Define the path to the image folder
     image_path = cfg.image_path / image_name
 
@@ -36,5 +80,7 @@ async def get_image(image_name: str) -> FileResponse:
     if not image_path.exists():
         raise HTTPException(status_code=404, detail=f"Image {image_name} not found")
 
-    # Return the image as a streaming response
-    return FileResponse(image_path)
+    if w is None:
+        return _cached_file_response(request, image_path)
+    thumbnail = await aio.to_thread(get_thumbnail, image_path, w, fmt)
+    return _cached_file_response(request, thumbnail, MEDIA_TYPES[fmt])
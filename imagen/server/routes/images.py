@@ -0,0 +1,28 @@
+"""Image listing routes for the API."""
+
+import asyncio as aio
+
+from fastapi import APIRouter, Query
+
+from imagen.model.image import FIELD
+from imagen.server.model import ImageInfo, ImagePage
+from imagen.vdb.lancedb_info import SortField, get_page
+from imagen.vdb.lancedb_persistence import TBL
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+
+@router.get("")
+async def list_images(
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, gt=0, le=1000),
+    sort: SortField | None = None,
+    descending: bool = True,
+) -> ImagePage:
+    """List image metadata one page at a time, reading only the listed columns."""
+    page, total = await aio.gather(
+        aio.to_thread(get_page, offset, limit, sort, descending, FIELD.info), aio.to_thread(TBL.count_rows)
+    )
+    return ImagePage(
+        total=total, offset=offset, limit=limit, images=[ImageInfo.from_row(row) for row in page.to_pylist()]
+    )
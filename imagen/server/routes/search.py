@@ -1,15 +1,21 @@
 """Search routes for the API."""
 
 import asyncio as aio
+from collections.abc import Sequence
 
-from fastapi import APIRouter, File, Form, UploadFile
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 
 from imagen.model.image import Image
-from imagen.server.model import SearchRequest, SearchResponse
+from imagen.server.model import (
+    BatchSearchRequest,
+    BatchSearchResponse,
+    SearchRequest,
+    SearchResponse,
+)
 from imagen.utils.combine import combine_results
-from imagen.utils.file_utils import get_temp_file
+from imagen.vdb.hybrid_search import hybrid_search
 from imagen.vdb.image_search_helper import image_search
-from imagen.vdb.text_search import text_search
+from imagen.vdb.text_search import SearchMode, text_search, text_search_batch
 
 router = APIRouter(prefix="/search", tags=["search"])
 
@@ -17,19 +23,43 @@ router = APIRouter(prefix="/search", tags=["search"])
 @router.post("/text")
 async def search_text(request: SearchRequest) -> list[SearchResponse]:
     """Search for images based on a text query."""
-    res = await text_search(request.search, request.limit)
+    res = await text_search(
+        request.search, request.limit, nprobes=request.nprobes, refine_factor=request.refine_factor, mode=request.mode
+    )
     return SearchResponse.from_images(res)
 
 
-async def _search_image(file: UploadFile, limit: int) -> list[Image]:
-    with get_temp_file(file.file, delete=False) as tmp:  # type: ignore
-        return image_search(tmp, limit)
+@router.post("/batch")
+async def search_batch(request: BatchSearchRequest) -> list[BatchSearchResponse]:
+    """Search for images based on many text queries at once. Results are grouped per query, in request order."""
+    res = await text_search_batch(
+        request.searches,
+        request.limit,
+        nprobes=request.nprobes,
+        refine_factor=request.refine_factor,
+        mode=request.mode,
+    )
+    return [
+        BatchSearchResponse(search=search, results=SearchResponse.from_images(images))
+        for search, images in zip(request.searches, res, strict=True)
+    ]
+
+
+async def _search_image(
+    file: UploadFile, limit: int, nprobes: int | None = None, refine_factor: int | None = None
+) -> Sequence[Image]:
+    return await image_search(await file.read(), limit, nprobes=nprobes, refine_factor=refine_factor)
 
 
 @router.post("/image")
-async def search_image(file: UploadFile = File(...), limit: int = Form(default=10)) -> list[SearchResponse]:  # noqa: B008
+async def search_image(
+    file: UploadFile = File(...),  # noqa: B008
+    limit: int = Form(default=10),
+    nprobes: int | None = Form(default=None),
+    refine_factor: int | None = Form(default=None),
+) -> list[SearchResponse]:
     """Search for images based on an uploaded image."""
-    return SearchResponse.from_images(await _search_image(file, limit))
+    return SearchResponse.from_images(await _search_image(file, limit, nprobes, refine_factor))
 
 
 LIMIT = 5
@@ -40,3 +70,17 @@ async def search_text_image(file: UploadFile = File(...), search: str = Form(...
     """Search for images based on an uploaded image and a text query."""
     res_image, res_text = await aio.gather(_search_image(file, LIMIT), text_search(search, LIMIT))
     return SearchResponse.from_images(combine_results(res_image, res_text, LIMIT))
+
+
+@router.post("/hybrid")
+async def search_hybrid(
+    file: UploadFile | None = File(default=None),  # noqa: B008
+    search: str | None = Form(default=None),
+    limit: int = Form(default=10),
+    mode: SearchMode = Form(default=SearchMode.DESCRIPTION),  # noqa: B008
+) -> list[SearchResponse]:
+    """Search with keywords, text and image vectors at once, fused by reciprocal rank fusion."""
+    if file is None and not search:
+        raise HTTPException(status_code=422, detail="Provide a search expression, an image or both")
+    image = await file.read() if file is not None else None
+    return SearchResponse.from_images(await hybrid_search(search, image, limit, mode=mode))
@@ -0,0 +1,68 @@
+"""Server startup phase: model loading, warm-up and readiness tracking."""
+
+import asyncio as aio
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from imagen.config import ExecutorKind, cfg
+from imagen.log import logger
+from imagen.service.image.embedding import load_model, warm_up_image, warm_up_text
+from imagen.service.image.executor import run_inference
+
+
+@dataclass
+class Readiness:
+    """Startup progress reported by the readiness endpoint."""
+
+    ready: bool = False
+    error: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+async def _start_workers() -> None:
+    """Start the inference processes, each of which loads and warms up the model in its initializer."""
+    pids = await aio.gather(*(run_inference(os.getpid) for _ in range(cfg.inference_workers)))
+    logger.info("Inference workers %s are ready", sorted(set(pids)))
+
+
+def _open_table() -> None:
+    from imagen.vdb.lancedb_persistence import TBL, prepare_table
+
+    prepare_table()
+    logger.info("Table %s has %d rows", cfg.lance_table_image, TBL.count_rows())
+
+
+async def startup(readiness: Readiness) -> None:
+    """Prepare the model and database, recording how long each step takes."""
+    steps: list[tuple[str, Callable[[], Awaitable[Any]]]]
+    if cfg.inference_executor == ExecutorKind.PROCESS:
+        steps = [("start_workers", _start_workers)]
+    else:
+        # Inference threads share the model of this process, so it is prepared once
+        steps = [
+            ("load_model", lambda: run_inference(load_model)),
+            ("warm_up_image", lambda: run_inference(warm_up_image)),
+            ("warm_up_text", lambda: run_inference(warm_up_text)),
+        ]
+    steps.append(("open_table", lambda: aio.to_thread(_open_table)))
+    total = time.perf_counter()
+    try:
+        for name, step in steps:
+            start = time.perf_counter()
+            await step()
+            readiness.timings[name] = time.perf_counter() - start
+            logger.info("Startup step %s took %.3fs", name, readiness.timings[name])
+    except Exception as exc:
+        readiness.error = f"{type(exc).__name__}: {exc}"
+        logger.exception("Startup failed")
+        raise
+    readiness.timings["total"] = time.perf_counter() - total
+    logger.info(
+        "Startup finished in %.3fs (%s)",
+        readiness.timings["total"],
+        ", ".join(f"{name}={seconds:.3f}s" for name, seconds in readiness.timings.items() if name != "total"),
+    )
+    readiness.ready = True
@@ -0,0 +1,137 @@
+"""Two-tier embedding cache: an in-process LRU with TTL and an optional SQLite file that survives restarts."""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+
+from imagen.config import cfg
+from imagen.log import logger
+
+CACHES: dict[str, "EmbeddingCache"] = {}
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters for a cache."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+
+class EmbeddingCache:
+    """Cache embeddings by key, evicting the least recently used entries once a tier is full."""
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = cfg.embedding_cache_size,
+        ttl: float = cfg.embedding_cache_ttl,
+        disk_path: Path | None = cfg.embedding_cache_path,
+        disk_max_entries: int = cfg.embedding_cache_disk_size,
+    ) -> None:
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_max_entries = disk_max_entries
+        self._memory: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._db: sqlite3.Connection | None = None
+        if disk_path is not None:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache "
+                "(namespace TEXT, key TEXT, vector BLOB, created REAL, accessed REAL, PRIMARY KEY (namespace, key))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS embedding_cache_accessed ON embedding_cache (accessed)")
+        CACHES[namespace] = self
+
+    @property
+    def stats(self) -> CacheStats:
+        self._stats.size = len(self._memory)
+        return self._stats
+
+    def get(self, key: str) -> list[float] | None:
+        """Return the cached embedding or None, counting the hit or miss."""
+        now = time.time()
+        with self._lock:
+            if (entry := self._memory.get(key)) is not None:
+                created, vector = entry
+                if now - created < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats.memory_hits += 1
+                    return vector.tolist()  # type: ignore[no-any-return]
+                del self._memory[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector, created FROM embedding_cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row is not None and now - row[1] < self.ttl:
+                    self._db.execute(
+                        "UPDATE embedding_cache SET accessed = ? WHERE namespace = ? AND key = ?",
+                        (now, self.namespace, key),
+                    )
+                    self._db.commit()
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, row[1], vector)
+                    self._stats.disk_hits += 1
+                    return vector.tolist()  # type: ignore[no-any-return]
+            self._stats.misses += 1
+            return None
+
+    def put(self, key: str, embedding: list[float]) -> None:
+        """Store an embedding in both tiers."""
+        now = time.time()
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._remember(key, now, vector)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, vector.tobytes(), now, now),
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def _remember(self, key: str, created: float, vector: np.ndarray) -> None:
+        self._memory[key] = (created, vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats.evictions += 1
+
+    def _evict_disk(self) -> None:
+        assert self._db is not None
+        (count,) = self._db.execute(
+            "SELECT COUNT(*) FROM embedding_cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        if count <= self.disk_max_entries:
+            return
+        # Drop a tenth of the capacity at once so eviction does not run on every insert
+        excess = count - self.disk_max_entries + self.disk_max_entries // 10
+        self._db.execute(
+            "DELETE FROM embedding_cache WHERE rowid IN "
+            "(SELECT rowid FROM embedding_cache WHERE namespace = ? ORDER BY accessed LIMIT ?)",
+            (self.namespace, excess),
+        )
+        self._stats.evictions += excess
+        logger.info("Evicted %d entries from the %s disk cache", excess, self.namespace)
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a search query so trivially different spellings share a cache entry."""
+    return " ".join(text.split()).casefold()
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """Counters for every cache created in this process."""
+    return {namespace: asdict(cache.stats) for namespace, cache in CACHES.items()}
@@ -1,55 +1,84 @@
+import hashlib
 import shutil
 import uuid
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterable, AsyncIterator, Buffer, Sequence
+from itertools import batched
 from pathlib import Path
 
+import aiofiles
 from PIL import Image as PILImage
 
 from imagen.config import cfg
 from imagen.log import logger
 from imagen.model.image import Image
-from imagen.service.image.embedding import image_embeddings as _image_embeddings
+from imagen.service.image.embedding import image_embeddings_batch
+from imagen.service.image.executor import run_inference
 from imagen.service.llava_client import describe
-from imagen.service.text import text_embeddings
+from imagen.service.text import text_embeddings_batch
+from imagen.utils.file_utils import bytes_digest, file_digest, unlink_file
 
 
-async def image_embeddings(images_path: Path, glob_expression: str = "*.png") -> AsyncIterator[Image]:
+async def image_embeddings(
+    images_path: Path, glob_expression: str = "*.png", batch_size: int | None = None
+) -> AsyncIterator[Image]:
     if not images_path.exists():
         return
-    for im in images_path.glob(glob_expression):
-        if image := await convert_single_image(im):
+    for batch in batched(images_path.glob(glob_expression), batch_size or cfg.clip_batch_size):
+        for image in await convert_images(batch):
             yield image
 
 
 async def convert_single_image(im: Path) -> Image | None:
-    logger.info(f""" ===== {im.as_posix()} =====""")
-    logger.info(f"Image exists: {im.exists()}")
-
-    new_image_path = copy_image_to_images_folder(im)
-    if not new_image_path.exists():
-        raise FileNotFoundError(im)
-
-    description = await describe(new_image_path)
-    logger.info(f"description: {description}\n")
-
-    if description:
-        image_embedding = _image_embeddings(im)
-        embedding = await text_embeddings(description)
-        return Image(new_image_path.name, description, image_embedding, embedding, new_image_path)
-    return None
+    images = await convert_images([im])
+    return images[0] if images else None
+
+
+async def convert_images(images: Sequence[Path]) -> list[Image]:
+    """Describe and embed a group of images, running CLIP once for the whole group."""
+    described: list[tuple[Path, Path, str, str]] = []
+    for im in images:
+        logger.info(f""" ===== {im.as_posix()} =====""")
+        logger.info(f"Image exists: {im.exists()}")
+
+        digest = file_digest(im)
+        new_image_path = copy_image_to_images_folder(im)
+        if not new_image_path.exists():
+            raise FileNotFoundError(im)
+
+        description = await describe(new_image_path)
+        logger.info(f"description: {description}\n")
+        if description:
+            described.append((im, new_image_path, description, digest))
+
+    if not described:
+        return []
+    image_vectors = await run_inference(image_embeddings_batch, [im for im, _, _, _ in described])
+    text_vectors = await text_embeddings_batch([description for _, _, description, _ in described])
+    return [
+        Image(new_image_path.name, description, image_vector, text_vector, new_image_path, digest=digest)
+        for (_, new_image_path, description, digest), image_vector, text_vector in zip(
+            described, image_vectors, text_vectors, strict=True
+        )
+    ]
 
 
 NAME_LIMIT = 100
 NAME_TRANS = str.maketrans(",+;", "   ")
 
 
-def copy_image_to_images_folder(im: Path) -> Path:
-    """Copy an image to the image storage folder."""
-    logger.info("Original image name: %s", im)
+def stored_image_path(file_name: str) -> Path:
+    """Pick the path in the image storage folder for a file name."""
+    im = Path(Path(file_name).name)
     name = f"{uuid.uuid4()}_{im.name}"
     if len(im.stem) > NAME_LIMIT:
         name = f"{im.stem[:NAME_LIMIT]}{im.suffix}"
-    new_image: Path = cfg.image_path / name.translate(NAME_TRANS)
+    return cfg.image_path / name.translate(NAME_TRANS)
+
+
+def copy_image_to_images_folder(im: Path) -> Path:
+    """Copy an image to the image storage folder."""
+    logger.info("Original image name: %s", im)
+    new_image = stored_image_path(im.name)
     if new_image.suffix == ".webp":
         new_image = new_image.parent / f"{new_image.stem}.png"
         logger.info("New image name: %s", new_image)
@@ -67,6 +96,51 @@ def convert_webp_to_png(im: Path, new_image: Path) -> None:
         img.save(new_image, "PNG")
 
 
+async def store_image_stream(chunks: AsyncIterable[bytes], file_name: str) -> tuple[Path, str]:
+    """Write streamed image bytes straight to the storage folder, hashing them on the way.
+
+    Returns the stored path and the SHA-256 digest of the bytes. The partial file is removed on error.
+    """
+    path = stored_image_path(file_name)
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(path, "wb") as file:
+            async for chunk in chunks:
+                digest.update(chunk)
+                await file.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, digest.hexdigest()
+
+
+def store_image_bytes(data: Buffer, file_name: str) -> tuple[Path, str]:
+    """Write an in-memory image to the storage folder. Returns the stored path and its digest."""
+    path = stored_image_path(file_name)
+    path.write_bytes(data)
+    return path, bytes_digest(data)
+
+
+async def convert_stored_image(path: Path, digest: str) -> Image | None:
+    """Describe and embed an image that is already in the storage folder.
+
+    The file is read once and the same buffer feeds both llava and CLIP.
+    """
+    if path.suffix == ".webp":
+        png = path.with_suffix(".png")
+        convert_webp_to_png(path, png)
+        unlink_file(path)
+        path = png
+    data = path.read_bytes()
+    description = await describe(data)
+    logger.info(f"description: {description}\n")
+    if not description:
+        return None
+    image_vector = (await run_inference(image_embeddings_batch, [data], 1))[0]
+    text_vector = (await text_embeddings_batch([description]))[0]
+    return Image(path.name, description, image_vector, text_vector, path, digest=digest)
+
+
 if __name__ == "__main__":
     import asyncio as aio
 
@@ -1,14 +1,58 @@
 import io
+import threading
+from collections.abc import Buffer, Callable, Iterable
+from itertools import batched
 from pathlib import Path
+from typing import Any, BinaryIO
 
 import clip  # type: ignore
 import numpy as np
 import torch
 from PIL import Image
 
+from imagen.config import cfg
 from imagen.log import logger
 
-model, preprocess = clip.load("ViT-L/14", device="cpu", jit=True)
+_model: Any = None
+_preprocess: Callable[[Image.Image], torch.Tensor] | None = None
+_model_lock = threading.Lock()
+
+# An image file path, its raw bytes or an open binary file
+ImageSource = Path | Buffer | BinaryIO
+
+
+def load_model() -> tuple[Any, Callable[[Image.Image], torch.Tensor]]:
+    """Load the CLIP model and its preprocessor once per process."""
+    global _model, _preprocess
+    with _model_lock:
+        if _model is None or _preprocess is None:
+            logger.info("Loading CLIP model %s", cfg.clip_model)
+            _model, _preprocess = clip.load(cfg.clip_model, device="cpu", jit=True)
+        return _model, _preprocess
+
+
+def warm_up_image() -> None:
+    """Run image inferences on a blank image so the JIT is compiled before real traffic."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (224, 224)).save(buffer, "PNG")
+    for _ in range(cfg.warm_up_iterations):
+        image_embeddings_batch([buffer.getvalue()], 1)
+
+
+def warm_up_text() -> None:
+    """Run text inferences so the JIT is compiled before real traffic."""
+    for _ in range(cfg.warm_up_iterations):
+        text_embeddings("warm up")
+
+
+def prepare_worker() -> None:
+    """Load and warm up the model in an inference worker.
+
+    Used as the process pool initializer. It returns nothing, since the TorchScript model cannot be pickled.
+    """
+    load_model()
+    warm_up_image()
+    warm_up_text()
 
 
 def img_to_stream(path: Path) -> io.BytesIO:
@@ -22,35 +66,94 @@ def convert_to_list(array: np.ndarray) -> list[float]:
     return array.cpu().detach().numpy().astype("float32")[0].tolist()  # type: ignore
 
 
-def image_embeddings(path: Path) -> list[float]:
+def open_image(source: ImageSource) -> Image.Image:
+    """Open an image from a file path, an in-memory byte buffer or a binary file object, decoding in memory."""
+    if isinstance(source, Path):
+        if not source.exists():
+            msg = f"Path {source} does not exist"
+            raise FileNotFoundError(msg)
+        # PIL reads the file lazily and closes it once the pixels are loaded
+        return Image.open(source)
+    if isinstance(source, Buffer):
+        return Image.open(io.BytesIO(source))
+    return Image.open(source)
+
+
+def image_embeddings_batch(sources: Iterable[ImageSource], batch_size: int | None = None) -> np.ndarray:
+    """
+    Generates embeddings for many images at once.
+
+    The images are preprocessed and stacked into batches of ``batch_size``
+    tensors so that the CLIP model runs one forward pass per batch instead of
+    one per image. Each batch is normalized in a single operation.
+
+    Parameters:
+    - sources (Iterable[ImageSource]): Image file paths, raw image bytes or binary file objects.
+    - batch_size (int | None): Images per forward pass. Defaults to ``cfg.clip_batch_size``.
+
+    Returns:
+    - np.ndarray: A float32 matrix with one normalized embedding per row, in input order.
     """
-    Generates an embedding for an image at a specified path.
+    model, preprocess = load_model()
+    batch_size = batch_size or cfg.clip_batch_size
+    chunks: list[np.ndarray] = []
+    with torch.no_grad():
+        for batch in batched(sources, batch_size):
+            tensor = torch.stack([preprocess(open_image(source)) for source in batch]).to("cpu")
+            image_emb = model.encode_image(tensor)
+            image_emb /= image_emb.norm(dim=-1, keepdim=True)
+            logger.info(f"Batch shape normalized: {image_emb.shape}")
+            chunks.append(image_emb.cpu().numpy().astype(np.float32))
+    if not chunks:
+        return np.empty((0, cfg.image_vector_size), dtype=np.float32)
+    return np.concatenate(chunks)
+
+
+def image_embeddings(path: ImageSource) -> list[float]:
+    """
+    Generates an embedding for an image at a specified path, in memory or in an open file.
 
-    This function processes an image through the pre-loaded CLIP model to
-    generate a normalized embedding vector. The embedding is then converted
-    to a list of floats. Logging is used to track the shape of the embedding
-    before and after normalization.
+    This is a single image shortcut for ``image_embeddings_batch``.
 
     Parameters:
-    - path (Path): The file path to the image for which the embedding is generated.
+    - path (ImageSource): The image for which the embedding is generated.
 
     Returns:
     - List[float]: A normalized embedding of the image as a list of floats.
     """
+    embedding: list[float] = image_embeddings_batch([path], 1)[0].tolist()
+    return embedding
+
+
+def text_embeddings_batch(texts: Iterable[str], batch_size: int | None = None) -> np.ndarray:
+    """
+    Generates CLIP text embeddings, in the same space as the image embeddings, for many texts at once.
+
+    Returns:
+    - np.ndarray: A float32 matrix with one normalized embedding per row, in input order.
+    """
+    model, _ = load_model()
+    batch_size = batch_size or cfg.clip_text_batch_size
+    chunks: list[np.ndarray] = []
     with torch.no_grad():
-        image = Image.open(img_to_stream(path))
-        image_emb = model.encode_image(preprocess(image).unsqueeze(0).to("cpu"))
-        logger.info(f"Shape: {image_emb.shape}")
-        image_emb /= image_emb.norm(dim=-1, keepdim=True)
-        logger.info(f"Shape normalized: {image_emb.shape}")
-        return convert_to_list(image_emb)
+        for batch in batched(texts, batch_size):
+            text_emb = model.encode_text(clip.tokenize(list(batch), truncate=True).to("cpu"))
+            text_emb /= text_emb.norm(dim=-1, keepdim=True)
+            chunks.append(text_emb.cpu().numpy().astype(np.float32))
+    if not chunks:
+        return np.empty((0, cfg.image_vector_size), dtype=np.float32)
+    return np.concatenate(chunks)
 
 
 def text_embeddings(text: str) -> list[float]:
-    with torch.no_grad():
-        text_emb = model.encode_text(clip.tokenize([text], truncate=True).to("cpu"))
-        text_emb /= text_emb.norm(dim=-1, keepdim=True)
-        return convert_to_list(text_emb)
+    embedding: list[float] = text_embeddings_batch([text], 1)[0].tolist()
+    return embedding
+
+
+def text_embeddings_list(texts: list[str]) -> list[list[float]]:
+    """Batched CLIP text embeddings as plain lists, for callers that cache or serialize them."""
+    embeddings: list[list[float]] = text_embeddings_batch(texts).tolist()
+    return embeddings
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+"""Worker pool that keeps CLIP inference off the event loop."""
+
+import asyncio as aio
+import multiprocessing as mp
+import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Generic, ParamSpec, TypeVar
+from weakref import WeakKeyDictionary
+
+from imagen.config import ExecutorKind, cfg
+from imagen.log import logger
+
+P = ParamSpec("P")
+T = TypeVar("T")
+R = TypeVar("R")
+
+_executor: Executor | None = None
+_slots = threading.BoundedSemaphore(cfg.inference_queue_size)
+_lock = threading.Lock()
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when the inference queue cannot accept more work."""
+
+
+def get_executor() -> Executor:
+    """Return the shared inference executor, creating it on first use."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            logger.info("Starting %s inference pool with %d workers", cfg.inference_executor, cfg.inference_workers)
+            if cfg.inference_executor == ExecutorKind.PROCESS:
+                from imagen.service.image.embedding import prepare_worker
+
+                # Spawn fresh interpreters so torch state is never forked. Every worker loads and
+                # warms up its own model before it accepts work
+                _executor = ProcessPoolExecutor(
+                    cfg.inference_workers, mp_context=mp.get_context("spawn"), initializer=prepare_worker
+                )
+            else:
+                _executor = ThreadPoolExecutor(cfg.inference_workers, thread_name_prefix="inference")
+        return _executor
+
+
+async def run_inference(func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """Run a blocking model call in the inference pool without blocking the event loop.
+
+    Raises InferenceQueueFull if cfg.inference_queue_size calls are already queued or running.
+    """
+    if not _slots.acquire(blocking=False):
+        msg = f"Inference queue is full ({cfg.inference_queue_size} pending calls)"
+        raise InferenceQueueFull(msg)
+    try:
+        loop = aio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+    finally:
+        _slots.release()
+
+
+@dataclass
+class _Pending(Generic[T, R]):
+    items: list[tuple[T, aio.Future[R]]] = field(default_factory=list)
+    timer: aio.TimerHandle | None = None
+
+
+class InferenceBatcher(Generic[T, R]):
+    """Coalesce concurrent single inputs into one batched inference call.
+
+    A batch runs once ``max_size`` inputs are waiting or ``max_wait`` seconds after the first one arrived.
+    Batches are kept per event loop because Streamlit runs each call in a fresh loop.
+    """
+
+    def __init__(self, func: Callable[[list[T]], Sequence[R]], max_size: int, max_wait: float) -> None:
+        self.func = func
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._pending: WeakKeyDictionary[aio.AbstractEventLoop, _Pending[T, R]] = WeakKeyDictionary()
+        # The loop only keeps weak references to tasks, so running batches are held here until they finish
+        self._tasks: set[aio.Task[Sequence[R]]] = set()
+
+    async def __call__(self, item: T) -> R:
+        loop = aio.get_running_loop()
+        if (pending := self._pending.get(loop)) is None:
+            pending = self._pending[loop] = _Pending()
+            pending.timer = loop.call_later(self.max_wait, self._flush, loop)
+        future: aio.Future[R] = loop.create_future()
+        pending.items.append((item, future))
+        if len(pending.items) >= self.max_size:
+            self._flush(loop)
+        return await future
+
+    def _flush(self, loop: aio.AbstractEventLoop) -> None:
+        if (pending := self._pending.pop(loop, None)) is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+        task = loop.create_task(run_inference(self.func, [item for item, _ in pending.items]))
+        self._tasks.add(task)
+        task.add_done_callback(partial(self._resolve, pending.items))
+
+    def _resolve(self, items: list[tuple[T, aio.Future[R]]], task: aio.Task[Sequence[R]]) -> None:
+        """Hand the batch result, or its failure, to every waiting caller."""
+        self._tasks.discard(task)
+        if task.cancelled():
+            for _, future in items:
+                future.cancel()
+            return
+        if (error := task.exception()) is not None:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), result in zip(items, task.result(), strict=True):
+            if not future.done():
+                future.set_result(result)
+
+
+def shutdown_executor() -> None:
+    """Stop the inference pool and wait for running calls to finish."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
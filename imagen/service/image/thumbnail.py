@@ -0,0 +1,69 @@
+"""Resized image derivatives, generated once and kept in a cache directory."""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from enum import StrEnum
+from pathlib import Path
+
+from PIL import Image
+
+from imagen.config import cfg
+from imagen.log import logger
+
+
+class ThumbnailFormat(StrEnum):
+    WEBP = "webp"
+    JPEG = "jpeg"
+
+
+MEDIA_TYPES = {ThumbnailFormat.WEBP: "image/webp", ThumbnailFormat.JPEG: "image/jpeg"}
+
+
+def snap_width(width: int) -> int:
+    """Round a requested width up to the nearest configured size so the cache stays bounded."""
+    return next((w for w in sorted(cfg.thumbnail_widths) if w >= width), max(cfg.thumbnail_widths))
+
+
+def thumbnail_path(image_path: Path, width: int, fmt: ThumbnailFormat) -> Path:
+    return cfg.thumbnail_path / str(width) / f"{image_path.name}.{fmt}"
+
+
+def get_thumbnail(image_path: Path, width: int, fmt: ThumbnailFormat = ThumbnailFormat.WEBP) -> Path:
+    """Return the derivative of an image, creating it if it is missing or older than the original."""
+    width = snap_width(width)
+    target = thumbnail_path(image_path, width, fmt)
+    if target.exists() and target.stat().st_mtime >= image_path.stat().st_mtime:
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with Image.open(image_path) as img:
+        img.thumbnail((width, width * img.height // max(img.width, 1) or 1))
+        if fmt == ThumbnailFormat.JPEG and img.mode != "RGB":
+            img = img.convert("RGB")
+        # Write to a unique temporary name first so concurrent readers never see a partial file
+        # and concurrent writers of the same derivative never share one
+        partial = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+        img.save(partial, fmt.value.upper(), quality=cfg.thumbnail_quality)
+    try:
+        partial.replace(target)
+    except OSError:
+        partial.unlink(missing_ok=True)
+        # Another writer finished the same derivative first
+        if not target.exists():
+            raise
+    return target
+
+
+def generate_thumbnails(widths: tuple[int, ...], fmt: ThumbnailFormat = ThumbnailFormat.WEBP) -> int:
+    """Create the derivatives of every stored image and return how many images were processed."""
+    images = [path for path in cfg.image_path.iterdir() if path.is_file()]
+
+    def generate(image_path: Path) -> None:
+        for width in widths:
+            try:
+                get_thumbnail(image_path, width, fmt)
+            except OSError:
+                logger.exception("Could not create thumbnail for %s", image_path)
+
+    with ThreadPoolExecutor() as pool:
+        list(pool.map(generate, images))
+    return len(images)
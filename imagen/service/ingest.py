@@ -0,0 +1,312 @@
+"""Concurrent staged ingestion pipeline.
+
+Files flow through bounded queues between stages so that file copies, llava descriptions,
+CLIP batches, text embeddings and database writes all overlap:
+
+    copy -> describe -> clip -> text -> save
+"""
+
+import asyncio as aio
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+import numpy as np
+import openai
+from PIL import Image as PILImage
+
+from imagen.config import cfg
+from imagen.log import logger
+from imagen.model.image import Image
+from imagen.service.conversion_service import copy_image_to_images_folder
+from imagen.service.image.embedding import image_embeddings_batch
+from imagen.service.image.executor import InferenceQueueFull, run_inference
+from imagen.service.llava_client import describe
+from imagen.service.manifest import IngestManifest, IngestStatus
+from imagen.service.text import text_embeddings_batch
+from imagen.utils.file_utils import file_digest
+
+_DONE = object()
+_SKIPPED = object()
+# Failures of a single item: unreadable files and images, model and HTTP errors and malformed responses.
+# Anything else is a bug and stops the pipeline
+ITEM_ERRORS = (
+    OSError,
+    ValueError,
+    KeyError,
+    PILImage.DecompressionBombError,
+    aiohttp.ClientError,
+    openai.OpenAIError,
+    InferenceQueueFull,
+)
+
+
+@dataclass
+class IngestItem:
+    """An image moving through the pipeline."""
+
+    source: Path
+    digest: str | None = None
+    path: Path | None = None
+    description: str = ""
+    image_embedding: np.ndarray = field(default_factory=lambda: np.empty(0, np.float32))
+    text_embedding: np.ndarray = field(default_factory=lambda: np.empty(0, np.float32))
+
+    def to_image(self) -> Image:
+        assert self.path is not None
+        return Image(
+            self.path.name,
+            self.description,
+            self.image_embedding,
+            self.text_embedding,
+            self.path,
+            digest=self.digest,
+        )
+
+
+@dataclass
+class StageStats:
+    """Progress counters for a single pipeline stage."""
+
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    busy: float = 0.0
+
+    def summary(self, elapsed: float) -> str:
+        rate = self.processed / elapsed if elapsed else 0.0
+        skipped = f", {self.skipped} skipped" if self.skipped else ""
+        return f"{self.name}: {self.processed} ok, {self.failed} failed{skipped}, {rate:.2f}/s"
+
+
+class IngestPipeline:
+    """Ingest many images with a separate concurrency setting per stage.
+
+    If ``exists`` is given, it is called with each file's content digest and files that
+    are already stored are skipped before any copy, llava or CLIP work.
+
+    If ``manifest`` is given, every file's progress is recorded in it and, when ``resume``
+    is set, files it records as done and unchanged are skipped without being read. The sink must return
+    True when it queued a row for a later write, so the file is only marked done once
+    that write happens (see ``IngestManifest.mark_stored``).
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[Image], Any],
+        *,
+        exists: Callable[[str], bool] | None = None,
+        manifest: IngestManifest | None = None,
+        resume: bool = True,
+        copy_workers: int | None = None,
+        describe_workers: int | None = None,
+        text_workers: int | None = None,
+        batch_size: int | None = None,
+        queue_size: int | None = None,
+    ) -> None:
+        self.sink = sink
+        self.exists = exists
+        self.manifest = manifest
+        self.resume = resume
+        self.batch_size = batch_size or cfg.clip_batch_size
+        self.queue_size = queue_size or cfg.ingest_queue_size
+        self.stats = {
+            "copy": StageStats("copy", copy_workers or cfg.ingest_copy_workers),
+            "describe": StageStats("describe", describe_workers or cfg.ingest_describe_workers),
+            "clip": StageStats("clip", 1),
+            "text": StageStats("text", text_workers or cfg.ingest_text_workers),
+            "save": StageStats("save", 1),
+        }
+        self.started = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def report(self) -> str:
+        elapsed = self.elapsed
+        return " | ".join(stats.summary(elapsed) for stats in self.stats.values())
+
+    async def run(self, paths: Iterable[Path]) -> int:
+        """Push every path through the pipeline and return the number of saved images."""
+        queues = {name: aio.Queue[Any](self.queue_size) for name in self.stats}
+        self.started = time.perf_counter()
+        reporter = aio.create_task(self._report())
+        try:
+            async with aio.TaskGroup() as tg:
+                tg.create_task(self._feed(paths, queues["copy"]))
+                tg.create_task(self._stage("copy", queues["copy"], queues["describe"], self._copy, "describe"))
+                tg.create_task(self._stage("describe", queues["describe"], queues["clip"], self._describe, "clip"))
+                tg.create_task(
+                    self._batch_stage("clip", queues["clip"], queues["text"], self._clip, self.batch_size, "text")
+                )
+                tg.create_task(
+                    self._batch_stage(
+                        "text", queues["text"], queues["save"], self._text, cfg.text_embed_batch_size, "save"
+                    )
+                )
+                tg.create_task(self._stage("save", queues["save"], None, self._save, None))
+        finally:
+            reporter.cancel()
+        logger.info("Ingest finished in %.1fs: %s", self.elapsed, self.report())
+        return self.stats["save"].processed
+
+    async def _report(self) -> None:
+        while True:
+            await aio.sleep(cfg.ingest_report_interval)
+            logger.info("Ingest progress after %.0fs: %s", self.elapsed, self.report())
+
+    async def _feed(self, paths: Iterable[Path], outbox: aio.Queue) -> None:
+        for path in paths:
+            if self.resume and self.manifest is not None and await aio.to_thread(self.manifest.is_done, path):
+                self.stats["copy"].skipped += 1
+                continue
+            await outbox.put(IngestItem(path))
+        await self._close(outbox, "copy")
+
+    async def _close(self, outbox: aio.Queue | None, next_stage: str | None) -> None:
+        """Tell every worker of the next stage that no more items are coming."""
+        if outbox is not None and next_stage is not None:
+            for _ in range(self.stats[next_stage].workers):
+                await outbox.put(_DONE)
+
+    async def _stage(
+        self,
+        name: str,
+        inbox: aio.Queue,
+        outbox: aio.Queue | None,
+        func: Callable[[IngestItem], Awaitable[Any]],
+        next_stage: str | None,
+    ) -> None:
+        stats = self.stats[name]
+
+        async def worker() -> None:
+            while (item := await inbox.get()) is not _DONE:
+                start = time.perf_counter()
+                try:
+                    result = await func(item)
+                except ITEM_ERRORS as exc:
+                    logger.exception("Ingest stage %s failed for %s", name, item.source)
+                    result, error = None, f"{type(exc).__name__}: {exc}"
+                else:
+                    error = "no result"
+                stats.busy += time.perf_counter() - start
+                if result is _SKIPPED:
+                    stats.skipped += 1
+                    continue
+                if result is None:
+                    self._fail(name, item, error)
+                    continue
+                stats.processed += 1
+                if outbox is not None:
+                    await outbox.put(result)
+
+        await aio.gather(*(worker() for _ in range(stats.workers)))
+        await self._close(outbox, next_stage)
+
+    def _fail(self, name: str, item: IngestItem, error: str) -> None:
+        self.stats[name].failed += 1
+        if self.manifest is not None:
+            self.manifest.record(item.source, IngestStatus.FAILED, error=f"{name}: {error}")
+
+    async def _copy(self, item: IngestItem) -> IngestItem | object:
+        item.digest = await aio.to_thread(file_digest, item.source)
+        if self.exists is not None and await aio.to_thread(self.exists, item.digest):
+            logger.info("Skipping %s, the image is already stored", item.source)
+            if self.manifest is not None:
+                self.manifest.record(item.source, IngestStatus.DONE, digest=item.digest)
+            return _SKIPPED
+        item.path = self._previous_copy(item) or await aio.to_thread(copy_image_to_images_folder, item.source)
+        if self.manifest is not None:
+            self.manifest.record(item.source, IngestStatus.PENDING, digest=item.digest, stored_name=item.path.name)
+        return item
+
+    def _previous_copy(self, item: IngestItem) -> Path | None:
+        """Reuse the stored copy left behind by an earlier run that did not finish."""
+        if self.manifest is None or (entry := self.manifest.get(item.source)) is None:
+            return None
+        if entry.digest != item.digest or entry.stored_name is None:
+            return None
+        path = cfg.image_path / entry.stored_name
+        return path if path.exists() else None
+
+    async def _describe(self, item: IngestItem) -> IngestItem | None:
+        assert item.path is not None
+        item.description = await describe(item.path)
+        if not item.description:
+            logger.warning("No description for %s", item.source)
+            return None
+        return item
+
+    async def _batch_stage(
+        self,
+        name: str,
+        inbox: aio.Queue,
+        outbox: aio.Queue,
+        embed: Callable[[list[IngestItem]], Awaitable[None]],
+        batch_size: int,
+        next_stage: str,
+    ) -> None:
+        """Collect items into batches and embed each batch with a single call."""
+        stats = self.stats[name]
+
+        async def worker() -> None:
+            done = False
+            while not done:
+                batch: list[IngestItem] = []
+                while len(batch) < batch_size:
+                    try:
+                        timeout = cfg.ingest_batch_timeout if batch else None
+                        item = await aio.wait_for(inbox.get(), timeout)
+                    except TimeoutError:
+                        break
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+                start = time.perf_counter()
+                for item in await self._embed_batch(name, batch, embed):
+                    stats.processed += 1
+                    await outbox.put(item)
+                stats.busy += time.perf_counter() - start
+
+        await aio.gather(*(worker() for _ in range(stats.workers)))
+        await self._close(outbox, next_stage)
+
+    async def _embed_batch(
+        self, name: str, batch: list[IngestItem], embed: Callable[[list[IngestItem]], Awaitable[None]]
+    ) -> list[IngestItem]:
+        if not batch:
+            return []
+        try:
+            await embed(batch)
+        except ITEM_ERRORS as exc:
+            if len(batch) == 1:
+                logger.exception("Ingest stage %s failed for %s", name, batch[0].source)
+                self._fail(name, batch[0], f"{type(exc).__name__}: {exc}")
+                return []
+            # Isolate the broken item by retrying one by one
+            logger.warning("Ingest stage %s failed for a batch, retrying %d items individually", name, len(batch))
+            return [item for single in batch for item in await self._embed_batch(name, [single], embed)]
+        return batch
+
+    async def _clip(self, batch: list[IngestItem]) -> None:
+        vectors: np.ndarray = await run_inference(image_embeddings_batch, [item.source for item in batch])
+        for item, vector in zip(batch, vectors, strict=True):
+            item.image_embedding = vector
+
+    async def _text(self, batch: list[IngestItem]) -> None:
+        vectors = await text_embeddings_batch([item.description for item in batch])
+        for item, vector in zip(batch, vectors, strict=True):
+            item.text_embedding = np.asarray(vector, dtype=np.float32)
+
+    async def _save(self, item: IngestItem) -> IngestItem:
+        queued = await aio.to_thread(self.sink, item.to_image())
+        if self.manifest is not None and queued is not True:
+            self.manifest.record(item.source, IngestStatus.DONE)
+        return item
@@ -2,14 +2,13 @@
 
 from pathlib import Path
 
-import aiohttp
-
 from imagen.config import cfg
+from imagen.utils.http_client import client_session
 from imagen.utils.image import encode_image
 
 
-async def describe(image_path: Path, prompt: str = "What is in this picture?") -> str:
-    """Create a description for an image at the given path using a specified prompt."""
+async def describe(image_path: Path | bytes, prompt: str = "What is in this picture?") -> str:
+    """Create a description for an image at the given path, or in a buffer, using a specified prompt."""
     data = {
         "model": "llava",
         "prompt": prompt,
@@ -32,7 +31,7 @@ async def embeddings(image_path: Path, description: str) -> list[float]:
 async def _post(data: dict, route: str) -> dict:
     """Make a POST request and just return the value of the key from the response."""
     url = f"{cfg.ollama_base_url}/{route}"
-    async with aiohttp.ClientSession() as session, session.post(url, json=data) as resp:
+    async with client_session() as session, session.post(url, json=data) as resp:
         output: dict = await resp.json()
     return output
 
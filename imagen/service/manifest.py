@@ -0,0 +1,125 @@
+"""Persistent manifest of ingested files so interrupted ingests can resume."""
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+from imagen.config import cfg
+
+
+class IngestStatus(StrEnum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class ManifestEntry:
+    """What is known about a source file from earlier ingest runs."""
+
+    source: str
+    size: int
+    mtime: float
+    digest: str | None
+    stored_name: str | None
+    status: IngestStatus
+    error: str | None
+
+
+class IngestManifest:
+    """Record (source path, size, mtime, digest) -> stored name and status in SQLite.
+
+    Files are marked done only once their row is written to the database, so a crash
+    never leaves a file marked done without its row.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path or cfg.ingest_manifest_path or cfg.lance_db_location / "ingest_manifest.sqlite"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS manifest (source TEXT PRIMARY KEY, size INTEGER, mtime REAL, "
+            "digest TEXT, stored_name TEXT, status TEXT, error TEXT, updated REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS manifest_stored_name ON manifest (stored_name)")
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    @staticmethod
+    def _key(source: Path) -> str:
+        return source.resolve().as_posix()
+
+    def get(self, source: Path) -> ManifestEntry | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT source, size, mtime, digest, stored_name, status, error FROM manifest WHERE source = ?",
+                (self._key(source),),
+            ).fetchone()
+        return ManifestEntry(*row[:5], IngestStatus(row[5]), row[6]) if row else None
+
+    def is_done(self, source: Path) -> bool:
+        """Check if the file was ingested and has not changed since, without reading its content."""
+        entry = self.get(source)
+        if entry is None or entry.status != IngestStatus.DONE:
+            return False
+        stat = source.stat()
+        return entry.size == stat.st_size and entry.mtime == stat.st_mtime
+
+    def record(
+        self,
+        source: Path,
+        status: IngestStatus,
+        *,
+        digest: str | None = None,
+        stored_name: str | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Insert or update a file's entry, keeping known digest and stored name if not given."""
+        stat = source.stat()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO manifest VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (source) DO UPDATE SET "
+                "size = excluded.size, mtime = excluded.mtime, digest = COALESCE(excluded.digest, digest), "
+                "stored_name = COALESCE(excluded.stored_name, stored_name), status = excluded.status, "
+                "error = excluded.error, updated = excluded.updated",
+                (self._key(source), stat.st_size, stat.st_mtime, digest, stored_name, status, error, time.time()),
+            )
+            self._db.commit()
+
+    def mark_stored(self, stored_names: Iterable[str]) -> None:
+        """Mark files done once their rows are written to the database."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "UPDATE manifest SET status = ?, error = NULL, updated = ? WHERE stored_name = ?",
+                [(IngestStatus.DONE, now, name) for name in stored_names],
+            )
+            self._db.commit()
+
+    def summary(self) -> dict[str, int]:
+        """Number of files per status."""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM manifest GROUP BY status").fetchall()
+        return dict(rows)
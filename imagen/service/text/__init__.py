@@ -1,12 +1,61 @@
 """Text embedding services."""
 
+from collections.abc import Sequence
+
 from imagen.config import cfg
+from imagen.service.cache import EmbeddingCache, normalize_query
 from imagen.service.text.nomic import text_embeddings as nomic_text_embeddings
+from imagen.service.text.nomic import (
+    text_embeddings_batch as nomic_text_embeddings_batch,
+)
 from imagen.service.text.openai import text_embeddings as openai_text_embeddings
+from imagen.service.text.openai import (
+    text_embeddings_batch as openai_text_embeddings_batch,
+)
+
+_query_cache = EmbeddingCache("text")
+
+
+def _cache_key(model: str, query: str) -> str:
+    # Ollama queries moved from /api/embeddings to the normalizing /api/embed, the prefix skips older vectors
+    return f"{model}:embed:{query}"
 
 
 async def text_embeddings(text: str) -> list[float]:
     """Return text embeddings."""
     if cfg.openai_embeddings_model:
-        return openai_text_embeddings(text)
+        return await openai_text_embeddings(text)
     return await nomic_text_embeddings(text)
+
+
+async def text_embeddings_batch(texts: Sequence[str]) -> list[list[float]]:
+    """Return text embeddings for many texts, in input order."""
+    if cfg.openai_embeddings_model:
+        return await openai_text_embeddings_batch(texts)
+    return await nomic_text_embeddings_batch(texts)
+
+
+async def query_embeddings(text: str) -> list[float]:
+    """Return text embeddings for a search query, cached by model and normalized text."""
+    query = normalize_query(text)
+    key = _cache_key(cfg.openai_embeddings_model or cfg.nomic_embed_model, query)
+    if (embedding := _query_cache.get(key)) is not None:
+        return embedding
+    embedding = await text_embeddings(query)
+    _query_cache.put(key, embedding)
+    return embedding
+
+
+async def query_embeddings_batch(texts: Sequence[str]) -> list[list[float]]:
+    """Return cached text embeddings for many search queries, embedding all misses in one batched call."""
+    model = cfg.openai_embeddings_model or cfg.nomic_embed_model
+    queries = [normalize_query(text) for text in texts]
+    found: dict[str, list[float]] = {}
+    for query in set(queries):
+        if (embedding := _query_cache.get(_cache_key(model, query))) is not None:
+            found[query] = embedding
+    if missing := [query for query in dict.fromkeys(queries) if query not in found]:
+        for query, embedding in zip(missing, await text_embeddings_batch(missing), strict=True):
+            _query_cache.put(_cache_key(model, query), embedding)
+            found[query] = embedding
+    return [found[query] for query in queries]
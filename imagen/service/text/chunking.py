@@ -0,0 +1,33 @@
+"""Split text embedding requests into batches the backends accept."""
+
+from collections.abc import Iterator, Sequence
+
+from imagen.config import cfg
+
+# A rough characters-per-token ratio for English text, good enough to stay under request limits
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_texts(
+    texts: Sequence[str],
+    max_items: int | None = None,
+    max_tokens: int | None = None,
+) -> Iterator[list[str]]:
+    """Yield consecutive chunks of texts limited by item count and estimated token count."""
+    max_items = max_items or cfg.text_embed_batch_size
+    max_tokens = max_tokens or cfg.text_embed_batch_tokens
+    chunk: list[str] = []
+    tokens = 0
+    for text in texts:
+        size = estimate_tokens(text)
+        if chunk and (len(chunk) >= max_items or tokens + size > max_tokens):
+            yield chunk
+            chunk, tokens = [], 0
+        chunk.append(text)
+        tokens += size
+    if chunk:
+        yield chunk
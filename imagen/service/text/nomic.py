@@ -1,26 +1,38 @@
-import aiohttp
+from collections.abc import Sequence
 
 from imagen.config import cfg
 from imagen.log import logger
+from imagen.service.text.chunking import chunk_texts
+from imagen.utils.http_client import client_session
 
 
 async def text_embeddings(prompt: str) -> list[float]:
     """
     Asynchronously creates text embeddings using a specified model.
 
+    This goes through the same endpoint as ``text_embeddings_batch``, which returns L2 normalized
+    vectors, so single queries and stored descriptions are embedded in the same space.
+
     Args:
     prompt (str): The text prompt to create embeddings for.
 
     Returns:
-    Union[List[float], None]: A list of float embeddings if successful, None otherwise.
+    List[float]: The embedding of the prompt.
     """
-    url = f"{cfg.ollama_base_url}/embeddings"
-    data = {"model": cfg.nomic_embed_model, "prompt": prompt}
-    logger.debug("embeddings input: %s", data)
-    async with aiohttp.ClientSession() as session, session.post(url, json=data) as resp:
-        response_json: dict = await resp.json()
-        embeddings: list[float] = response_json["embedding"]
-        return embeddings
+    logger.debug("embeddings input: %s", prompt)
+    return (await text_embeddings_batch([prompt]))[0]
+
+
+async def text_embeddings_batch(prompts: Sequence[str]) -> list[list[float]]:
+    """Embed many prompts using Ollama's batch embed endpoint."""
+    url = f"{cfg.ollama_base_url}/embed"
+    embeddings: list[list[float]] = []
+    for chunk in chunk_texts(prompts):
+        data = {"model": cfg.nomic_embed_model, "input": chunk}
+        async with client_session() as session, session.post(url, json=data) as resp:
+            response_json: dict = await resp.json()
+            embeddings.extend(response_json["embeddings"])
+    return embeddings
 
 
 if __name__ == "__main__":
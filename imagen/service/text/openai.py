@@ -1,17 +1,57 @@
-from openai import OpenAI
+import asyncio as aio
+from collections.abc import Sequence
+from weakref import WeakKeyDictionary
+
+from openai import AsyncOpenAI
 
 from imagen.config import cfg
+from imagen.service.text.chunking import chunk_texts
+
+_clients: WeakKeyDictionary[aio.AbstractEventLoop, AsyncOpenAI] = WeakKeyDictionary()
+_limits: WeakKeyDictionary[aio.AbstractEventLoop, aio.Semaphore] = WeakKeyDictionary()
+
 
-client = OpenAI(api_key=cfg.openai_api_key)
+def _client() -> AsyncOpenAI:
+    """Return the client of the running loop. Its connection pool cannot be shared with other loops."""
+    loop = aio.get_running_loop()
+    if (client := _clients.get(loop)) is None:
+        client = _clients[loop] = AsyncOpenAI(
+            api_key=cfg.openai_api_key, timeout=cfg.openai_timeout, max_retries=cfg.openai_max_retries
+        )
+    return client
 
 
-def text_embeddings(text: str) -> list[float]:
+def _limit() -> aio.Semaphore:
+    """Return the request limit of the running loop. Streamlit runs each call in a fresh loop."""
+    loop = aio.get_running_loop()
+    if (limit := _limits.get(loop)) is None:
+        limit = _limits[loop] = aio.Semaphore(cfg.openai_max_concurrency)
+    return limit
+
+
+def _model() -> str:
     if cfg.openai_embeddings_model is None:
         msg = "OpenAI embeddings model is not defined in the config"
         raise ValueError(msg)
-    return client.embeddings.create(input=[text], model=cfg.openai_embeddings_model).data[0].embedding
+    return cfg.openai_embeddings_model
+
+
+async def _embed(texts: list[str]) -> list[list[float]]:
+    async with _limit():
+        response = await _client().embeddings.create(input=texts, model=_model())
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+async def text_embeddings(text: str) -> list[float]:
+    return (await _embed([text]))[0]
+
+
+async def text_embeddings_batch(texts: Sequence[str]) -> list[list[float]]:
+    """Embed many texts, sending as many per request as the limits allow and running requests concurrently."""
+    chunks = await aio.gather(*(_embed(chunk) for chunk in chunk_texts(texts)))
+    return [embedding for chunk in chunks for embedding in chunk]
 
 
 if __name__ == "__main__":
-    res = text_embeddings("This is a sime text.")
+    res = aio.run(text_embeddings("This is a sime text."))
     print(len(res))
@@ -1,7 +1,11 @@
 """Combine and rank image and text search results."""
 
+from collections.abc import Sequence
 from dataclasses import dataclass
 
+import numpy as np
+
+from imagen.config import cfg
 from imagen.model.image import Image
 
 
@@ -13,10 +17,10 @@ class SearchResult:
     rank: int | float
 
 
-def combine_results(res_image: list[Image], res_text: list[Image], limit: int) -> list[Image]:
+def combine_results(res_image: Sequence[Image], res_text: Sequence[Image], limit: int) -> list[Image]:
     """Combine and rank image and text search results."""
 
-    def rank_results(res: list[Image]) -> dict[str, SearchResult]:
+    def rank_results(res: Sequence[Image]) -> dict[str, SearchResult]:
         return {image.name: SearchResult(image, limit - i) for i, image in enumerate(res)}
 
     ranked_images = rank_results(res_image)
@@ -41,3 +45,35 @@ def combine_results(res_image: list[Image], res_text: list[Image], limit: int) -
 
     resp = sorted(combined_dict.values(), key=lambda x: x.rank, reverse=True)
     return [r.image for r in resp[:limit]]
+
+
+def reciprocal_rank_fusion(
+    results: Sequence[Sequence[Image]], weights: Sequence[float], limit: int, k: int = cfg.hybrid_rrf_k
+) -> list[Image]:
+    """Fuse ranked result lists with weighted reciprocal rank fusion.
+
+    Each image scores ``sum(weight / (k + rank))`` over the lists it appears in. The scores are computed
+    in one pass over a lists x candidates rank matrix and stored in ``Image.score``.
+    """
+    positions: dict[str, int] = {}
+    images: list[Image] = []
+    for res in results:
+        for image in res:
+            if image.name not in positions:
+                positions[image.name] = len(images)
+                images.append(image)
+            elif images[positions[image.name]].distance is None:
+                images[positions[image.name]].distance = image.distance
+    if not images:
+        return []
+    # Missing candidates keep an infinite rank, which contributes nothing to the score
+    ranks = np.full((len(results), len(images)), np.inf)
+    for row, res in enumerate(results):
+        ranks[row, [positions[image.name] for image in res]] = np.arange(1, len(res) + 1)
+    scores = (np.asarray(weights, dtype=np.float64)[:, None] / (k + ranks)).sum(axis=0)
+    fused = []
+    for index in np.argsort(-scores, kind="stable")[:limit]:
+        image = images[index]
+        image.score = float(scores[index])
+        fused.append(image)
+    return fused
@@ -2,10 +2,10 @@ from pathlib import Path
 from urllib.parse import urlparse
 
 import aiofiles
-import aiohttp
 
 from imagen.config import cfg
 from imagen.log import logger
+from imagen.utils.http_client import client_session
 
 
 async def download_image_from_url(url: str) -> Path | None:
@@ -17,7 +17,7 @@ async def download_image_from_url(url: str) -> Path | None:
 
 async def download_image(url: str, name: str) -> Path | None:
     """Download an image from a URL."""
-    async with aiohttp.ClientSession() as session, session.get(url) as response:
+    async with client_session() as session, session.get(url) as response:
         # Ensure the request was successful
         if response.status == 200:
             # Read the content of the response
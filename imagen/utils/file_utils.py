@@ -1,5 +1,6 @@
 """Utility functions for the app."""
 
+import hashlib
 from collections.abc import Buffer, Generator
 from contextlib import contextmanager
 from pathlib import Path
@@ -15,6 +16,17 @@ def unlink_file(tmp_path: Path) -> None:
         #     logger.exception(f"Failed to delete {tmp_path}: {exc}")
 
 
+def file_digest(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's bytes."""
+    with path.open("rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def bytes_digest(data: Buffer) -> str:
+    """Return the SHA-256 hex digest of an in-memory buffer."""
+    return hashlib.sha256(data).hexdigest()
+
+
 @contextmanager
 def get_temp_file(data: Buffer, *, delete: bool = True) -> Generator[Path, Any, Any]:
     """Create a temporary file from a buffer."""
@@ -0,0 +1,63 @@
+"""Shared, pooled HTTP client session for Ollama and download traffic."""
+
+import asyncio as aio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from imagen.config import cfg
+from imagen.log import logger
+
+_shared: tuple[aio.AbstractEventLoop, aiohttp.ClientSession] | None = None
+
+
+def _new_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=cfg.http_limit,
+        limit_per_host=cfg.http_limit_per_host,
+        keepalive_timeout=cfg.http_keepalive_timeout,
+        ttl_dns_cache=cfg.http_dns_cache_ttl,
+    )
+    timeout = aiohttp.ClientTimeout(total=cfg.http_timeout, connect=cfg.http_connect_timeout)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def _shared_session() -> aiohttp.ClientSession | None:
+    if _shared is None:
+        return None
+    loop, session = _shared
+    if session.closed or loop is not aio.get_running_loop():
+        return None
+    return session
+
+
+@asynccontextmanager
+async def http_session() -> AsyncIterator[aiohttp.ClientSession]:
+    """Keep one pooled session open for the duration of the block.
+
+    Use this around the server lifespan or a CLI run. Nested blocks reuse the open session.
+    """
+    global _shared
+    if (session := _shared_session()) is not None:
+        yield session
+        return
+    session = _new_session()
+    _shared = (aio.get_running_loop(), session)
+    logger.info("Opened shared HTTP session")
+    try:
+        yield session
+    finally:
+        _shared = None
+        await session.close()
+        logger.info("Closed shared HTTP session")
+
+
+@asynccontextmanager
+async def client_session() -> AsyncIterator[aiohttp.ClientSession]:
+    """Yield the shared session if one is open, otherwise a short-lived one."""
+    if (session := _shared_session()) is not None:
+        yield session
+        return
+    async with _new_session() as session:
+        yield session
@@ -4,7 +4,9 @@ from pathlib import Path
 # from tempfile import TemporaryDirectory
 
 
-def encode_image(path: Path) -> str:
+def encode_image(path: Path | bytes) -> str:
+    if isinstance(path, bytes):
+        return base64.b64encode(path).decode("ascii")
     with open(path, "rb") as f:
         bs = f.read()
         return base64.b64encode(bs).decode("ascii")
@@ -0,0 +1,144 @@
+"""Float16 copies of the vector columns for a cheaper first search pass.
+
+The float32 columns stay the source of truth: searches scan the half size float16 copies for
+``limit * cfg.compact_rerank_factor`` candidates and rerank those exactly with the float32 vectors.
+"""
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+import pyarrow as pa
+
+from imagen.config import cfg
+from imagen.log import logger
+from imagen.model.image import FIELD, ImageResults, to_float16
+from imagen.vdb.lancedb_persistence import (
+    DISTANCE,
+    TBL,
+    compact_knn_search,
+    exact_distances,
+    has_compact_vectors,
+)
+from imagen.vdb.vector_index import build_vector_index
+
+
+def migrate_compact_vectors(batch_size: int = cfg.transfer_batch_size, index: bool = True) -> list[str]:
+    """Add the float16 copies of the vector columns, filled in batches from the float32 ones.
+
+    Returns the added columns. Tables that already have the copies are left alone.
+    """
+    added = []
+    for column in FIELD.vectors:
+        compact = FIELD.compact(column)
+        if compact in TBL.schema.names:
+            continue
+
+        def convert(batch: pa.RecordBatch, column: str = column, compact: str = compact) -> pa.RecordBatch:
+            return pa.RecordBatch.from_arrays([to_float16(batch.column(column))], names=[compact])
+
+        start = time.perf_counter()
+        TBL.to_lance().add_columns(convert, read_columns=[column], batch_size=batch_size)
+        TBL.checkout_latest()
+        logger.info("Added %s in %.2fs", compact, time.perf_counter() - start)
+        added.append(compact)
+    if index:
+        for compact in added:
+            build_vector_index(compact)
+    return added
+
+
+def drop_compact_vectors() -> list[str]:
+    """Drop the float16 copies, going back to searching the float32 columns only."""
+    columns = [FIELD.compact(column) for column in FIELD.vectors if FIELD.compact(column) in TBL.schema.names]
+    if columns:
+        TBL.drop_columns(columns)
+    return columns
+
+
+@dataclass
+class BenchmarkResult:
+    """Recall against an exact search and latency of one search mode, in milliseconds."""
+
+    mode: str
+    recall: float
+    mean_ms: float
+    p95_ms: float
+    bytes_per_vector: int
+
+
+def _names(table: pa.Table) -> list[str]:
+    return table.column(FIELD.name).to_pylist()
+
+
+def benchmark_compact_search(
+    queries: int = 100,
+    limit: int = 10,
+    column: str = FIELD.image_vector,
+    distance: str = DISTANCE.EUCLIDEAN,
+    rerank_factor: int = cfg.compact_rerank_factor,
+    noise: float = 0.05,
+    seed: int = 0,
+) -> list[BenchmarkResult]:
+    """Compare float32 search, the float16 first pass alone and float16 with the float32 rerank.
+
+    Queries are stored vectors with gaussian noise added. Recall@limit is measured against
+    a brute force search over the float32 vectors.
+    """
+    if not has_compact_vectors():
+        msg = "The table has no float16 vector columns, run the migration first"
+        raise ValueError(msg)
+    stored = TBL.to_lance().to_table(columns=[FIELD.name, column])
+    if not stored.num_rows:
+        msg = "The table is empty"
+        raise ValueError(msg)
+    names = np.array(_names(stored))
+    matrix = ImageResults(stored).vectors(column)
+    rng = np.random.default_rng(seed)
+    picks = matrix[rng.integers(0, len(matrix), queries)]
+    samples = (picks + rng.normal(0, noise * np.abs(picks).mean(), picks.shape)).astype(np.float32)
+    truth = [set(names[np.argsort(exact_distances(matrix, q, distance), kind="stable")[:limit]]) for q in samples]
+
+    def search(vector_column: str) -> Callable[[np.ndarray], list[str]]:
+        def run(query: np.ndarray) -> list[str]:
+            result = (
+                TBL.search(query, query_type="vector", vector_column_name=vector_column)
+                .metric(distance)
+                .nprobes(cfg.search_nprobes)
+                .limit(limit)
+                .select([FIELD.name])
+                .to_arrow()
+            )
+            return _names(result)
+
+        return run
+
+    def rerank(query: np.ndarray) -> list[str]:
+        return compact_knn_search(query, column, limit, distance, rerank_factor=rerank_factor).column(FIELD.name)
+
+    dimension = matrix.shape[1]
+    modes = (
+        ("float32", search(column), dimension * 4),
+        ("float16", search(FIELD.compact(column)), dimension * 2),
+        (f"float16+rerank x{rerank_factor}", rerank, dimension * 2),
+    )
+    results = []
+    for mode, run, size in modes:
+        timings = []
+        hits = 0
+        for query, expected in zip(samples, truth, strict=True):
+            start = time.perf_counter()
+            found = run(query)
+            timings.append((time.perf_counter() - start) * 1000)
+            hits += len(expected.intersection(found))
+        results.append(
+            BenchmarkResult(
+                mode=mode,
+                recall=hits / sum(len(expected) for expected in truth),
+                mean_ms=float(np.mean(timings)),
+                p95_ms=float(np.percentile(timings, 95)),
+                bytes_per_vector=size,
+            )
+        )
+    return results
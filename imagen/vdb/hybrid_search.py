@@ -0,0 +1,61 @@
+"""Hybrid search fusing BM25 keyword hits on descriptions with text and image vector hits."""
+
+import asyncio as aio
+
+from imagen.config import cfg
+from imagen.model.image import Image
+from imagen.service.image.embedding import ImageSource
+from imagen.service.text import query_embeddings
+from imagen.utils.combine import reciprocal_rank_fusion
+from imagen.vdb.image_search_helper import (
+    query_clip_text_embeddings,
+    query_image_embeddings,
+)
+from imagen.vdb.lancedb_persistence import (
+    DISTANCE,
+    execute_fts_search,
+    execute_knn_search,
+)
+from imagen.vdb.text_search import SearchMode
+
+
+async def hybrid_search(
+    text: str | None = None,
+    image: ImageSource | None = None,
+    limit: int = 10,
+    candidates: int = cfg.hybrid_candidates,
+    distance: str = DISTANCE.EUCLIDEAN,
+    mode: SearchMode = SearchMode.DESCRIPTION,
+) -> list[Image]:
+    """Search by text, an image or both, and fuse the candidate lists with reciprocal rank fusion.
+
+    Text queries pull candidates from the text vectors and from the full-text index, which needs no
+    embedding call. Images pull candidates from the image vectors. In CLIP mode the text is encoded with
+    the local CLIP model and matched against the image vectors instead of the description vectors.
+    """
+    if not text and image is None:
+        msg = "Hybrid search needs a text or an image"
+        raise ValueError(msg)
+    if mode == SearchMode.CLIP:
+        embed_text, text_column = query_clip_text_embeddings, Image.field.image_vector
+    else:
+        embed_text, text_column = query_embeddings, Image.field.text_vector
+    text_embedding, image_embedding = await aio.gather(
+        embed_text(text) if text else aio.sleep(0),
+        query_image_embeddings(image) if image is not None else aio.sleep(0),
+    )
+    searches = []
+    weights = []
+    if text_embedding is not None:
+        searches.append(aio.to_thread(execute_knn_search, text_embedding, text_column, candidates, distance))
+        weights.append(cfg.hybrid_text_weight)
+    if image_embedding is not None:
+        searches.append(
+            aio.to_thread(execute_knn_search, image_embedding, Image.field.image_vector, candidates, distance)
+        )
+        weights.append(cfg.hybrid_image_weight)
+    if text:
+        searches.append(aio.to_thread(execute_fts_search, text, candidates))
+        weights.append(cfg.hybrid_fts_weight)
+    results = await aio.gather(*searches)
+    return reciprocal_rank_fusion(results, weights, limit)
@@ -1,21 +1,92 @@
+import asyncio as aio
+from collections.abc import Buffer, Sequence
 from pathlib import Path
+from typing import BinaryIO
 
-from imagen.model.image import Image
-from imagen.service.image.embedding import image_embeddings
+from imagen.config import cfg
+from imagen.model.image import Image, ImageResults
+from imagen.service.cache import EmbeddingCache, normalize_query
+from imagen.service.image.embedding import (
+    ImageSource,
+    image_embeddings,
+    text_embeddings_list,
+)
+from imagen.service.image.executor import InferenceBatcher, run_inference
+from imagen.utils.file_utils import bytes_digest
 from imagen.vdb.lancedb_persistence import DISTANCE, execute_knn_search
 
+_query_cache = EmbeddingCache("clip_image")
+_text_query_cache = EmbeddingCache("clip_text")
+# Concurrent CLIP text queries share one forward pass
+_text_batcher = InferenceBatcher(text_embeddings_list, cfg.clip_text_batch_size, cfg.clip_text_batch_wait)
 
-def image_search(image_path: Path, limit: int = 10, distance: str = DISTANCE.EUCLIDEAN) -> list[Image]:
-    embedding = image_embeddings(image_path)
-    return execute_knn_search(embedding, Image.field.image_vector, limit, distance)
+
+def _read_source(image: ImageSource) -> bytes:
+    if isinstance(image, Path):
+        return image.read_bytes()
+    if isinstance(image, Buffer):
+        return bytes(image)
+    file: BinaryIO = image
+    file.seek(0)
+    return file.read()
+
+
+async def query_image_embeddings(image: ImageSource) -> list[float]:
+    """Return CLIP embeddings for a query image, cached by model and content hash."""
+    data = _read_source(image)
+    key = f"{cfg.clip_model}:{bytes_digest(data)}"
+    if (embedding := _query_cache.get(key)) is not None:
+        return embedding
+    embedding = await run_inference(image_embeddings, data)
+    _query_cache.put(key, embedding)
+    return embedding
+
+
+async def query_clip_text_embeddings(text: str) -> list[float]:
+    """Return CLIP text embeddings for a search query, cached by model and normalized text."""
+    query = normalize_query(text)
+    key = f"{cfg.clip_model}:{query}"
+    if (embedding := _text_query_cache.get(key)) is not None:
+        return embedding
+    embedding = await _text_batcher(query)
+    _text_query_cache.put(key, embedding)
+    return embedding
+
+
+async def query_clip_text_embeddings_batch(texts: Sequence[str]) -> list[list[float]]:
+    """Return cached CLIP text embeddings for many queries, encoding all misses in one inference call."""
+    queries = [normalize_query(text) for text in texts]
+    found: dict[str, list[float]] = {}
+    for query in set(queries):
+        if (embedding := _text_query_cache.get(f"{cfg.clip_model}:{query}")) is not None:
+            found[query] = embedding
+    if missing := [query for query in dict.fromkeys(queries) if query not in found]:
+        for query, embedding in zip(missing, await run_inference(text_embeddings_list, missing), strict=True):
+            _text_query_cache.put(f"{cfg.clip_model}:{query}", embedding)
+            found[query] = embedding
+    return [found[query] for query in queries]
+
+
+async def image_search(
+    image: ImageSource,
+    limit: int = 10,
+    distance: str = DISTANCE.EUCLIDEAN,
+    nprobes: int | None = None,
+    refine_factor: int | None = None,
+) -> ImageResults:
+    """Search by an image path, its bytes or an open binary file. The image is decoded in memory."""
+    embedding = await query_image_embeddings(image)
+    return await aio.to_thread(
+        execute_knn_search, embedding, Image.field.image_vector, limit, distance, nprobes, refine_factor
+    )
 
 
 if __name__ == "__main__":
-    from imagen.config import cfg
+    import asyncio as aio
 
     def search_tester(image_path: Path) -> None:
         print("Searching for: ", image_path)
-        for image in image_search(image_path, 3, DISTANCE.DOT):
+        for image in aio.run(image_search(image_path, 3, DISTANCE.DOT)):
             print(image.name)
             print("\n******************************************\n")
 
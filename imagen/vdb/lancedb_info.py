@@ -1,6 +1,12 @@
+from collections.abc import Sequence
+from enum import StrEnum
+from functools import lru_cache
 from typing import TYPE_CHECKING, Any
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 if TYPE_CHECKING:
     from pyarrow.lib import Schema
@@ -9,6 +15,11 @@ from imagen.model.image import FIELD
 from imagen.vdb.lancedb_persistence import TBL
 
 
+class SortField(StrEnum):
+    CREATED = FIELD.created
+    UPDATED = FIELD.updated
+
+
 def basic_info() -> tuple[int, list[str]]:
     rows = TBL.count_rows()
     column_names = TBL.schema.names
@@ -20,9 +31,46 @@ def col_info() -> list[tuple[str, Any]]:
     return list(zip(schema.names, schema.types, strict=False))
 
 
-def get_data() -> pd.DataFrame:
-    # Limit -1 fetches all records
-    df: pd.DataFrame = TBL.search().limit(-1).select(FIELD.info).to_pandas()
+def table_version() -> int:
+    """Return the latest table version, picking up writes from other processes."""
+    TBL.checkout_latest()
+    version: int = TBL.version
+    return version
+
+
+@lru_cache(maxsize=8)
+def _sorted_row_ids(version: int, sort: SortField, descending: bool) -> np.ndarray:
+    """Sort the row ids of a table version by one timestamp column, reading only that column."""
+    table = TBL.to_lance().to_table(columns=[sort], with_row_id=True)
+    order = pc.sort_indices(table, sort_keys=[(sort, "descending" if descending else "ascending")])
+    return table.column("_rowid").take(order).to_numpy()
+
+
+def get_page(
+    offset: int = 0,
+    limit: int = 100,
+    sort: SortField | None = None,
+    descending: bool = True,
+    columns: Sequence[str] = FIELD.info,
+) -> pa.Table:
+    """Read one page of rows with only the given columns, optionally sorted by a timestamp."""
+    version = table_version()
+    dataset = TBL.to_lance()
+    row_ids = _sorted_row_ids(version, sort, descending)[offset : offset + limit] if sort else None
+    if row_ids is None or not len(row_ids):
+        return dataset.to_table(columns=list(columns), offset=offset, limit=0 if sort else limit)
+    # Take by row id: positional take skips rows once the table has deletions
+    return dataset._take_rows(row_ids.tolist(), columns=list(columns))
+
+
+def get_data(
+    offset: int = 0,
+    limit: int = 100,
+    sort: SortField | None = None,
+    descending: bool = True,
+    columns: Sequence[str] = FIELD.info,
+) -> pd.DataFrame:
+    df: pd.DataFrame = get_page(offset, limit, sort, descending, columns).to_pandas()
     return df
 
 
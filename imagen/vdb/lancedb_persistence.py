@@ -1,15 +1,26 @@
+import asyncio as aio
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from enum import StrEnum
+from itertools import batched
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import lancedb  # type: ignore
+import numpy as np
+import pyarrow as pa
 
 from imagen.config import cfg
 from imagen.log import logger
-from imagen.model.image import Image
+from imagen.model.image import FIELD, Image, ImageResults, with_compact_vectors
 from imagen.service.conversion_service import (
     convert_single_image,
+    convert_stored_image,
 )
-from imagen.utils.file_utils import unlink_file
+from imagen.utils.file_utils import file_digest, unlink_file
+
+if TYPE_CHECKING:
+    from imagen.vdb.write_buffer import WriteBuffer
 
 DB = lancedb.connect(cfg.lance_db_location)
 try:
@@ -17,6 +28,102 @@ try:
 except FileNotFoundError:
     TBL = DB.create_table(cfg.lance_table_image, schema=Image.schema)
 
+# Lance reports I/O failures as OSError, invalid input as ValueError and other failures as RuntimeError
+LANCE_ERRORS = (OSError, ValueError, RuntimeError)
+
+
+def migrate_schema() -> None:
+    """Add columns introduced after the table was created."""
+    if FIELD.digest not in TBL.schema.names:
+        logger.info("Adding %s column to %s", FIELD.digest, cfg.lance_table_image)
+        TBL.add_columns({FIELD.digest: "CAST(NULL AS STRING)"})
+
+
+def backfill_digests(batch_size: int = cfg.upsert_batch_size) -> int:
+    """Fill in the digests of rows stored before digests existed, from their files in the image folder.
+
+    Duplicate checks look rows up by digest, so rows without one would never match. Rows whose
+    file is missing keep a null digest. Returns the number of rows filled in.
+    """
+    filled = 0
+    dataset = TBL.to_lance()
+    for batch in dataset.to_batches(filter=f"{FIELD.digest} IS NULL", batch_size=batch_size):
+        paths = [cfg.image_path / name for name in batch.column(FIELD.name).to_pylist()]
+        digests = pa.array([file_digest(path) if path.exists() else None for path in paths], pa.string())
+        table = pa.Table.from_batches([batch])
+        table = table.set_column(table.schema.get_field_index(FIELD.digest), FIELD.digest, digests)
+        table = table.filter(digests.is_valid())
+        if table.num_rows:
+            TBL.merge_insert(FIELD.name).when_matched_update_all().execute(table)
+            filled += table.num_rows
+    if filled:
+        logger.info("Filled in %d digests from the image folder", filled)
+    return filled
+
+
+def has_index(column: str) -> bool:
+    """Check if any index covers the column."""
+    return any(column in index["fields"] for index in TBL.to_lance().list_indices())
+
+
+def ensure_digest_index() -> None:
+    """Create the scalar index used for duplicate checks. Lance cannot index an empty table."""
+    if TBL.count_rows() and not has_index(FIELD.digest):
+        logger.info("Creating scalar index on %s", FIELD.digest)
+        TBL.create_scalar_index(FIELD.digest, replace=True)
+
+
+def ensure_fts_index(rebuild_rows: int | None = None) -> bool:
+    """Create the BM25 full-text index on descriptions, or rebuild it once ``rebuild_rows`` rows are unindexed.
+
+    Rows added after the last build are still searched, by a slower flat scan. Returns True when the index was built.
+    """
+    if not TBL.count_rows():
+        return False
+    index = next((i for i in TBL.to_lance().list_indices() if FIELD.description in i["fields"]), None)
+    if index is not None and (
+        rebuild_rows is None or TBL.to_lance().stats.index_stats(index["name"])["num_unindexed_rows"] < rebuild_rows
+    ):
+        return False
+    logger.info("Building full-text index on %s", FIELD.description)
+    TBL.create_fts_index(FIELD.description, use_tantivy=False, replace=True)
+    return True
+
+
+def has_compact_vectors() -> bool:
+    """Check if the table stores float16 copies of the vector columns."""
+    return all(FIELD.compact(column) in TBL.schema.names for column in FIELD.vectors)
+
+
+def to_table_rows(images: Sequence[Image]) -> pa.Table:
+    """Convert images to rows in the table layout, with float16 vector copies when the table has them."""
+    table = Image.batch_to_pyarrow(images)
+    return with_compact_vectors(table) if has_compact_vectors() else table
+
+
+def text_vectors_normalized(sample: int = 100) -> bool:
+    """Check that a sample of the stored text vectors has unit length, as both embedding backends return them."""
+    if not (rows := min(sample, TBL.count_rows())):
+        return True
+    table = TBL.to_lance().head(rows, columns=[FIELD.text_vector])
+    norms = np.linalg.norm(ImageResults(table).vectors(FIELD.text_vector), axis=1)
+    return bool(np.allclose(norms, 1, atol=1e-3))
+
+
+def prepare_table() -> None:
+    """Bring the table up to date: add new columns, fill in missing digests and create the indexes.
+
+    Call this once at startup, before the table is used.
+    """
+    migrate_schema()
+    backfill_digests()
+    ensure_digest_index()
+    ensure_fts_index()
+    if not text_vectors_normalized():
+        logger.warning(
+            "Stored text vectors are not normalized and rank poorly against queries, run the reembed-text command"
+        )
+
 
 class DISTANCE(StrEnum):
     EUCLIDEAN = "l2"
@@ -25,65 +132,211 @@ class DISTANCE(StrEnum):
 
 
 def execute_knn_search(
-    embedding: list[float],
+    embedding: list[float] | np.ndarray,
     vector_column_name: str,
     limit: int = 10,
     distance: str = DISTANCE.EUCLIDEAN,
-) -> list[Image]:
-    data: list[dict] = (
+    nprobes: int | None = None,
+    refine_factor: int | None = None,
+) -> ImageResults:
+    """Search a vector column. nprobes and refine_factor only apply once the column has an ANN index.
+
+    With ``cfg.compact_vectors`` the float16 copy of the column is searched first and the candidates are reranked.
+    """
+    if cfg.compact_vectors and has_compact_vectors():
+        return compact_knn_search(embedding, vector_column_name, limit, distance, nprobes)
+    table = (
         TBL.search(embedding, query_type="vector", vector_column_name=vector_column_name)
         .metric(distance)
+        .nprobes(nprobes or cfg.search_nprobes)
+        .refine_factor(refine_factor or cfg.search_refine_factor)
         .limit(limit)
-        .to_list()
+        .to_arrow()
+    )
+    return ImageResults(table)
+
+
+def exact_distances(vectors: np.ndarray, query: np.ndarray, distance: str = DISTANCE.EUCLIDEAN) -> np.ndarray:
+    """Compute distances the way Lance does: squared L2, 1 - cosine similarity or negative dot product."""
+    if distance == DISTANCE.COSINE:
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        return 1 - (vectors @ query) / np.where(norms == 0, 1, norms)
+    if distance == DISTANCE.DOT:
+        return -(vectors @ query)
+    return ((vectors - query) ** 2).sum(axis=1)
+
+
+def compact_knn_search(
+    embedding: list[float] | np.ndarray,
+    vector_column_name: str,
+    limit: int = 10,
+    distance: str = DISTANCE.EUCLIDEAN,
+    nprobes: int | None = None,
+    rerank_factor: int | None = None,
+) -> ImageResults:
+    """Search the float16 copy of a vector column, then rerank the candidates exactly with the float32 vectors.
+
+    The first pass reads half the vector bytes and returns only row ids for ``limit * rerank_factor`` candidates.
+    """
+    query = np.asarray(embedding, dtype=np.float32)
+    candidates = (
+        TBL.search(query, query_type="vector", vector_column_name=FIELD.compact(vector_column_name))
+        .metric(distance)
+        .nprobes(nprobes or cfg.search_nprobes)
+        .limit(limit * (rerank_factor or cfg.compact_rerank_factor))
+        .select([FIELD.name])
+        .with_row_id(True)
+        .to_arrow()
     )
-    return [Image.from_vdb(d) for d in data]
+    if not candidates.num_rows:
+        return ImageResults(Image.schema.empty_table())
+    rows = TBL.to_lance()._take_rows(candidates.column("_rowid").to_pylist(), columns=Image.schema.names)
+    distances = exact_distances(ImageResults(rows).vectors(vector_column_name), query, distance)
+    order = np.argsort(distances, kind="stable")[:limit]
+    return ImageResults(rows.take(order).append_column("_distance", pa.array(distances[order], pa.float32())))
+
+
+def execute_fts_search(query: str, limit: int = 10) -> ImageResults:
+    """Rank descriptions against a keyword query with BM25. The relevance is in ``Image.score``.
+
+    The full-text index is built on first use when rows were only added by direct writes.
+    """
+    if not TBL.count_rows():
+        return ImageResults(Image.schema.empty_table())
+    if not has_index(FIELD.description):
+        ensure_fts_index()
+    return ImageResults(TBL.search(query, query_type="fts").limit(limit).to_arrow())
+
+
+def execute_knn_search_batch(
+    embeddings: Sequence[list[float] | np.ndarray],
+    vector_column_name: str,
+    limit: int = 10,
+    distance: str = DISTANCE.EUCLIDEAN,
+    nprobes: int | None = None,
+    refine_factor: int | None = None,
+) -> list[ImageResults]:
+    """Search a vector column for many embeddings in parallel. Results are grouped per embedding, in input order."""
+    if len(embeddings) <= 1:
+        return [execute_knn_search(e, vector_column_name, limit, distance, nprobes, refine_factor) for e in embeddings]
+    # LanceDB releases the GIL while scanning, so the searches run concurrently on threads
+    with ThreadPoolExecutor(min(cfg.search_batch_workers, len(embeddings))) as pool:
+        return list(
+            pool.map(
+                lambda e: execute_knn_search(e, vector_column_name, limit, distance, nprobes, refine_factor),
+                embeddings,
+            )
+        )
 
 
 def sql_escape(text: str) -> str:
     return text.replace("'", "''")
 
 
-def convert_vec_to_literal(float_list: list[float]) -> list[str]:
-    return [str(v) for v in float_list]
+def find_by_digest(digest: str) -> Image | None:
+    """Find a stored image by its content digest using the scalar index."""
+    data: list[dict] = TBL.search().where(f"{FIELD.digest} = '{sql_escape(digest)}'", prefilter=True).limit(1).to_list()
+    return Image.from_vdb(data[0]) if data else None
+
+
+def find_existing(digest: str, buffer: "WriteBuffer | None" = None) -> Image | None:
+    """Find an image with the same content that is stored or waiting in the write buffer."""
+    if buffer is not None and (pending := buffer.pending(digest)) is not None:
+        return pending
+    return find_by_digest(digest)
+
+
+def image_exists(digest: str, buffer: "WriteBuffer | None" = None) -> bool:
+    return find_existing(digest, buffer) is not None
+
 
+def upsert_images(images: Sequence[Image], on: str = FIELD.digest, batch_size: int = cfg.upsert_batch_size) -> int:
+    """Insert new rows and update matching ones with one Lance merge_insert per batch.
 
-def get_first_result(image: Image) -> Image | None:
-    """Get the first result from the database."""
-    try:
-        return execute_knn_search(image.image_embedding, image.field.image_vector, 1)[0]
-    except IndexError:
-        return None
+    Rows are matched on the content digest or the name. Matched rows keep their stored name and
+    creation time. Lance rejects duplicate source keys, so when several images share a key only the
+    last one is written. Vectors go to Lance as Arrow arrays. Returns the number of rows written.
+    """
+    unique = list({getattr(image, on): image for image in images}.values())
+    written = 0
+    for batch in batched(unique, batch_size):
+        table = to_table_rows(batch)
+        keys = table.column(on)
+        if keys.null_count:
+            msg = f"Cannot upsert rows without a {on}"
+            raise ValueError(msg)
+        values = ", ".join("'" + sql_escape(key) + "'" for key in set(keys.to_pylist()))
+        # A plain scan, a search without a limit would stop at its default of ten rows
+        stored = TBL.to_lance().to_table(columns=[on, FIELD.name, FIELD.created], filter=f"{on} IN ({values})")
+        if stored.num_rows:
+            known = dict(zip(stored.column(on).to_pylist(), stored.select([FIELD.name, FIELD.created]).to_pylist()))
+            for column, type_ in ((FIELD.name, pa.string()), (FIELD.created, pa.timestamp("ms"))):
+                index = table.schema.get_field_index(column)
+                merged = [
+                    known[key][column] if key in known else value
+                    for key, value in zip(keys.to_pylist(), table.column(column).to_pylist(), strict=True)
+                ]
+                table = table.set_column(index, table.schema.field(index), pa.array(merged, type_))
+        TBL.merge_insert(on).when_matched_update_all().when_not_matched_insert_all().execute(table)
+        written += table.num_rows
+    return written
 
 
-def save_image(image: Image, *, ignore_update: bool = False) -> bool:
-    result = get_first_result(image)
-    image_available = image.matching_vector(result) if result else False
-    if not image_available:  # insert
+def save_image(image: Image, *, ignore_update: bool = False, buffer: "WriteBuffer | None" = None) -> bool:
+    if image.digest is None and image.image_path:
+        image.digest = file_digest(image.image_path)
+    result = find_existing(image.digest, buffer) if image.digest else None
+    if result is None:  # insert
         logger.info("Creating %s", image.name)
-        TBL.add(image.to_pyarrow())
+        if buffer is None:
+            TBL.add(to_table_rows([image]))
+        else:
+            buffer.add(image)
         return True
     logger.info("Updating %s", image.name)
-    if result and not ignore_update:
-        single_value = {
-            image.field.text_vector: convert_vec_to_literal(result.text_embedding),
-            image.field.description: sql_escape(result.description),
-            image.field.image_vector: convert_vec_to_literal(result.image_embedding),
-            image.field.updated: result.updated,
-        }
-        filter_expression = f"{image.field.name} = '{result.name}'"
-        if image.image_path:
+    if not ignore_update:
+        if image.image_path and image.name != result.name:
             # The file was uploaded again. Keep the old file to avoid dups.
             unlink_file(cfg.image_path / image.name)
-        TBL.update(where=filter_expression, values=single_value)
+        if buffer is not None and buffer.pending(result.digest or "") is result:
+            # Not written yet, so update the buffered row in place
+            result.description, result.image_embedding, result.text_embedding = (
+                image.description,
+                image.image_embedding,
+                image.text_embedding,
+            )
+        else:
+            upsert_images([image])
     return False
 
 
-async def save_image_from_path(image_path: Path) -> bool:
+async def save_image_from_path(image_path: Path, buffer: "WriteBuffer | None" = None) -> bool:
     if not image_path.exists():
         msg = f"Could not find original image path: {image_path}"
         raise FileNotFoundError(msg)
+    if await aio.to_thread(image_exists, file_digest(image_path), buffer):
+        # Same content is already stored, so skip llava and CLIP entirely
+        logger.info("Skipping %s, the image is already stored", image_path)
+        return False
     image_data = await convert_single_image(image_path)
     if image_data is None:
         msg = f"Image description is missing for {image_path}"
         raise ValueError(msg)
-    return save_image(image_data)
+    return await aio.to_thread(save_image, image_data, buffer=buffer)
+
+
+async def save_stored_image(image_path: Path, digest: str, buffer: "WriteBuffer | None" = None) -> bool:
+    """Save an image that was written straight to the storage folder, e.g. a streamed upload.
+
+    The table lookups and writes run in a thread so they never block the event loop.
+    """
+    if await aio.to_thread(image_exists, digest, buffer):
+        logger.info("Skipping %s, the image is already stored", image_path)
+        unlink_file(image_path)
+        return False
+    image_data = await convert_stored_image(image_path, digest)
+    if image_data is None:
+        unlink_file(image_path)
+        msg = f"Image description is missing for {image_path}"
+        raise ValueError(msg)
+    return await aio.to_thread(save_image, image_data, buffer=buffer)
@@ -0,0 +1,110 @@
+"""Table maintenance: fragment compaction, old version cleanup and index refresh.
+
+Every add or update creates a new Lance version and usually a small fragment, so scans slow
+down and disk usage grows until the table is optimized.
+"""
+
+import asyncio as aio
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from imagen.config import cfg
+from imagen.log import logger
+from imagen.vdb.lancedb_persistence import LANCE_ERRORS, TBL
+from imagen.vdb.vector_index import rebuild_stale_indexes
+
+if TYPE_CHECKING:
+    from imagen.vdb.write_buffer import WriteBuffer
+
+
+@dataclass
+class TableStats:
+    """Storage state of the image table."""
+
+    version: int
+    versions: int
+    fragments: int
+    rows: int
+    bytes: int
+
+
+@dataclass
+class OptimizeReport:
+    """Table state before and after an optimize run, with the duration of each step in seconds."""
+
+    before: TableStats
+    after: TableStats | None = None
+    fragments_removed: int = 0
+    fragments_added: int = 0
+    versions_removed: int = 0
+    bytes_removed: int = 0
+    indexes_rebuilt: list[str] = field(default_factory=list)
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+def table_stats() -> TableStats:
+    """Count the versions, fragments, rows and bytes on disk of the image table."""
+    dataset = TBL.to_lance()
+    return TableStats(
+        version=dataset.version,
+        versions=len(TBL.list_versions()),
+        fragments=len(dataset.get_fragments()),
+        rows=dataset.count_rows(),
+        bytes=sum(f.stat().st_size for f in Path(dataset.uri).rglob("*") if f.is_file()),
+    )
+
+
+def optimize_table(retention: timedelta | None = None, refresh_indexes: bool = True) -> OptimizeReport:
+    """Compact small fragments, delete versions older than ``retention`` and refresh indexes."""
+    retention = retention if retention is not None else timedelta(days=cfg.maintenance_retention_days)
+    report = OptimizeReport(before=table_stats())
+
+    start = time.perf_counter()
+    compaction = TBL.compact_files()
+    report.fragments_removed = compaction.fragments_removed
+    report.fragments_added = compaction.fragments_added
+    report.timings["compact"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cleanup = TBL.cleanup_old_versions(retention)
+    report.versions_removed = cleanup.old_versions
+    report.bytes_removed = cleanup.bytes_removed
+    report.timings["cleanup"] = time.perf_counter() - start
+
+    if refresh_indexes:
+        start = time.perf_counter()
+        # Add unindexed rows to the existing indexes, then retrain the ones that drifted too far
+        TBL.to_lance().optimize.optimize_indices()
+        report.indexes_rebuilt = rebuild_stale_indexes()
+        report.timings["indexes"] = time.perf_counter() - start
+
+    report.after = after = table_stats()
+    logger.info(
+        "Optimized %s: %d -> %d fragments, %d -> %d bytes, %d versions removed in %.2fs",
+        cfg.lance_table_image,
+        report.before.fragments,
+        after.fragments,
+        report.before.bytes,
+        after.bytes,
+        report.versions_removed,
+        sum(report.timings.values()),
+    )
+    return report
+
+
+async def run_maintenance(interval: float, buffer: "WriteBuffer | None" = None) -> None:
+    """Optimize the table every ``interval`` seconds. Run this as a task.
+
+    Buffered rows are flushed first so they are compacted with the rest of the table.
+    """
+    while True:
+        await aio.sleep(interval)
+        try:
+            if buffer is not None:
+                await aio.to_thread(buffer.flush)
+            await aio.to_thread(optimize_table)
+        except LANCE_ERRORS:
+            logger.exception("Table maintenance failed")
@@ -0,0 +1,45 @@
+"""Regenerate the stored text vectors from the descriptions.
+
+Nomic text vectors used to come from Ollama's /api/embeddings, which does not normalize them. Queries now
+go through the normalizing /api/embed, so vectors stored before that must be embedded again.
+"""
+
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from imagen.config import cfg
+from imagen.log import logger
+from imagen.model.image import FIELD, to_float16
+from imagen.service.text import text_embeddings_batch
+from imagen.vdb.lancedb_persistence import TBL, has_compact_vectors
+from imagen.vdb.vector_index import build_vector_index, vector_index_info
+
+
+async def reembed_text_vectors(batch_size: int = cfg.upsert_batch_size) -> int:
+    """Embed every description again and overwrite its text vector, one merge_insert per batch.
+
+    Returns the number of rows updated.
+    """
+    start = time.perf_counter()
+    compact = has_compact_vectors()
+    updated = 0
+    for batch in TBL.to_lance().to_batches(batch_size=batch_size):
+        table = pa.Table.from_batches([batch])
+        size = table.schema.field(FIELD.text_vector).type.list_size
+        embeddings = np.asarray(await text_embeddings_batch(table.column(FIELD.description).to_pylist()), np.float32)
+        vectors = pa.FixedSizeListArray.from_arrays(pa.array(embeddings.ravel()), size)
+        table = table.set_column(table.schema.get_field_index(FIELD.text_vector), FIELD.text_vector, vectors)
+        if compact:
+            column = FIELD.compact(FIELD.text_vector)
+            table = table.set_column(table.schema.get_field_index(column), column, to_float16(vectors))
+        TBL.merge_insert(FIELD.name).when_matched_update_all().execute(table)
+        updated += table.num_rows
+        logger.info("Embedded %d descriptions again", updated)
+    # The vectors moved, so their indexes were trained on the wrong distribution
+    for info in vector_index_info():
+        if info["index"] is not None and info["column"] in (FIELD.text_vector, FIELD.compact(FIELD.text_vector)):
+            build_vector_index(info["column"], info["metric"] or cfg.vector_index_metric, info["index_type"])
+    logger.info("Updated %d text vectors in %.2fs", updated, time.perf_counter() - start)
+    return updated
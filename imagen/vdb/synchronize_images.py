@@ -1,29 +1,89 @@
+"""Synchronize the image folder with the database.
+
+Both sides are loaded once, as the Arrow name column and a streamed directory listing, and compared as sets.
+"""
+
+import os
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from itertools import batched
+
 from imagen.config import cfg
+from imagen.log import logger
 from imagen.model.image import FIELD
-from imagen.vdb.lancedb_persistence import TBL
+from imagen.vdb.lancedb_persistence import TBL, sql_escape
+
+
+@dataclass
+class SyncReport:
+    """Differences between the image folder and the database, and what was done about them."""
+
+    dry_run: bool
+    # Files in the folder without a database row
+    orphan_files: list[str] = field(default_factory=list)
+    # Database rows without a file in the folder
+    missing_files: list[str] = field(default_factory=list)
+    files_removed: int = 0
+    rows_deleted: int = 0
+
+
+def stored_names() -> set[str]:
+    """Load every image name in the database in one scan of the name column."""
+    return set(TBL.to_lance().to_table(columns=[FIELD.name]).column(FIELD.name).to_pylist())
 
 
-def cleanup_image_folder() -> None:
+def folder_files() -> Iterator[tuple[str, float]]:
+    """Stream the names and modification times of the files in the image folder."""
+    with os.scandir(cfg.image_path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                yield entry.name, entry.stat().st_mtime
+
+
+def delete_rows(names: list[str], batch_size: int = cfg.sync_delete_batch_size) -> int:
+    """Delete rows by name with one ``IN (...)`` predicate per batch."""
+    for batch in batched(names, batch_size):
+        values = ", ".join("'" + sql_escape(name) + "'" for name in batch)
+        TBL.delete(f"{FIELD.name} IN ({values})")
+    return len(names)
+
+
+def cleanup_image_folder(dry_run: bool = False) -> SyncReport:
     """Remove images from the folder that are not in the database."""
-    for file in cfg.image_path.glob("*"):
-        res = TBL.search().where(f"{FIELD.name} = '{file.name}'", prefilter=True).to_list()
-        if len(res) == 0:
-            print(f"Cannot find {file.name}")
-            file.unlink()
+    return syncronize_db(dry_run, files=True, rows=False)
 
 
-def cleanup_db(limit: int = 1000) -> None:
+def cleanup_db(dry_run: bool = False) -> SyncReport:
     """Remove entries from the database that are not in the folder."""
-    res = TBL.search().limit(limit).to_list()
-    files = {f.name for f in list(cfg.image_path.glob("*"))}
-    for row in res:
-        name = row[FIELD.name]
-        if name not in files:
-            print(f"Image {name} not available in folder.")
-            TBL.delete(where=f"{FIELD.name} = '{name}'")
-
-
-def syncronize_db(limit: int = 1000) -> None:
-    """Synchronize the database with the image folder."""
-    cleanup_image_folder()
-    cleanup_db(limit)
+    return syncronize_db(dry_run, files=False, rows=True)
+
+
+def syncronize_db(dry_run: bool = False, *, files: bool = True, rows: bool = True) -> SyncReport:
+    """Synchronize the database with the image folder. With ``dry_run`` only report the differences.
+
+    Files modified in the last ``cfg.sync_grace_seconds`` are never removed, since they may be uploads
+    that are still being written or whose rows are still buffered.
+    """
+    report = SyncReport(dry_run)
+    names = stored_names()
+    cutoff = time.time() - cfg.sync_grace_seconds
+    on_disk: set[str] = set()
+    recent: set[str] = set()
+    for name, mtime in folder_files():
+        on_disk.add(name)
+        if mtime > cutoff:
+            recent.add(name)
+    if files:
+        report.orphan_files = sorted(on_disk - names - recent)
+    if rows:
+        report.missing_files = sorted(names - on_disk)
+    logger.info("%d files without a row, %d rows without a file", len(report.orphan_files), len(report.missing_files))
+    if dry_run:
+        return report
+    for name in report.orphan_files:
+        (cfg.image_path / name).unlink(missing_ok=True)
+        report.files_removed += 1
+    if report.missing_files:
+        report.rows_deleted = delete_rows(report.missing_files)
+    return report
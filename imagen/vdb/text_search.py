@@ -1,11 +1,60 @@
-from imagen.model.image import Image
-from imagen.service.text import text_embeddings
-from imagen.vdb.lancedb_persistence import DISTANCE, execute_knn_search
+import asyncio as aio
+from collections.abc import Sequence
+from enum import StrEnum
 
+from imagen.model.image import Image, ImageResults
+from imagen.service.text import query_embeddings, query_embeddings_batch
+from imagen.vdb.image_search_helper import (
+    query_clip_text_embeddings,
+    query_clip_text_embeddings_batch,
+)
+from imagen.vdb.lancedb_persistence import (
+    DISTANCE,
+    execute_knn_search,
+    execute_knn_search_batch,
+)
 
-async def text_search(image_description: str, limit: int = 10, distance: str = DISTANCE.EUCLIDEAN) -> list[Image]:
-    embedding = await text_embeddings(image_description)
-    return execute_knn_search(embedding, Image.field.text_vector, limit, distance)
+
+class SearchMode(StrEnum):
+    # Embed the query with the description model and match the llava descriptions
+    DESCRIPTION = "description"
+    # Embed the query locally with CLIP and match the images directly, without network calls
+    CLIP = "clip"
+
+
+async def text_search(
+    image_description: str,
+    limit: int = 10,
+    distance: str = DISTANCE.EUCLIDEAN,
+    nprobes: int | None = None,
+    refine_factor: int | None = None,
+    mode: SearchMode = SearchMode.DESCRIPTION,
+) -> ImageResults:
+    if mode == SearchMode.CLIP:
+        embedding = await query_clip_text_embeddings(image_description)
+        column = Image.field.image_vector
+    else:
+        embedding = await query_embeddings(image_description)
+        column = Image.field.text_vector
+    return await aio.to_thread(execute_knn_search, embedding, column, limit, distance, nprobes, refine_factor)
+
+
+async def text_search_batch(
+    image_descriptions: Sequence[str],
+    limit: int = 10,
+    distance: str = DISTANCE.EUCLIDEAN,
+    nprobes: int | None = None,
+    refine_factor: int | None = None,
+    mode: SearchMode = SearchMode.DESCRIPTION,
+) -> list[ImageResults]:
+    """Search for many descriptions with one embedding call and parallel vector searches."""
+    if mode == SearchMode.CLIP:
+        embeddings = await query_clip_text_embeddings_batch(image_descriptions)
+        column = Image.field.image_vector
+    else:
+        embeddings = await query_embeddings_batch(image_descriptions)
+        column = Image.field.text_vector
+    return await aio.to_thread(execute_knn_search_batch, embeddings, column, limit, distance, nprobes, refine_factor)
 
 
 # if __name__ == "__main__":
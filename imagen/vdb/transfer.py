@@ -0,0 +1,227 @@
+"""Stream the image table to and from Parquet, Arrow IPC and NDJSON files.
+
+Rows are moved as Arrow record batches, so neither side ever holds the whole table in memory.
+Only the rows are transferred: the image files themselves have to be copied separately.
+"""
+
+import json
+import time
+from collections.abc import Iterator, Sequence
+from datetime import datetime
+from enum import StrEnum
+from itertools import batched
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from imagen.config import cfg
+from imagen.log import logger
+from imagen.model.image import FIELD, SCHEMA, with_compact_vectors
+from imagen.utils.file_utils import file_digest
+from imagen.vdb.lancedb_persistence import (
+    TBL,
+    ensure_digest_index,
+    ensure_fts_index,
+    has_compact_vectors,
+)
+from imagen.vdb.vector_index import rebuild_stale_indexes
+
+REQUIRED_COLUMNS = (FIELD.name, FIELD.description, FIELD.image_vector, FIELD.text_vector)
+# Old pandas exports wrote millisecond timestamps as if they were nanoseconds, a million times too small
+_LEGACY_TIMESTAMP_SCALE = 1_000_000
+_LEGACY_TIMESTAMP_MAX = 10**10
+
+
+class FileFormat(StrEnum):
+    PARQUET = "parquet"
+    ARROW = "arrow"
+    NDJSON = "ndjson"
+    # Column oriented JSON as written by pandas.DataFrame.to_json, import only
+    JSON = "json"
+
+    @classmethod
+    def from_path(cls, path: Path) -> "FileFormat":
+        suffix = path.suffix.lower().lstrip(".")
+        aliases = {"jsonl": cls.NDJSON, "ipc": cls.ARROW, "feather": cls.ARROW}
+        if suffix in aliases:
+            return aliases[suffix]
+        if suffix == "csv":
+            msg = "CSV export was removed, it cannot hold the vector columns. Use parquet, arrow or ndjson"
+            raise ValueError(msg)
+        try:
+            return cls(suffix)
+        except ValueError:
+            msg = f"Cannot tell the format of {path}, use one of {', '.join(cls)}"
+            raise ValueError(msg) from None
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        # Float16 vector values come out of Arrow as numpy scalars
+        return value.item()
+    msg = f"Cannot serialize {type(value).__name__}"
+    raise TypeError(msg)
+
+
+def unknown_columns(columns: Sequence[str]) -> list[str]:
+    """Return the requested columns the image table does not have."""
+    names = set(TBL.schema.names)
+    return [column for column in columns if column not in names]
+
+
+def export_table(
+    path: Path,
+    fmt: FileFormat | None = None,
+    columns: Sequence[str] | None = None,
+    batch_size: int = cfg.transfer_batch_size,
+) -> int:
+    """Stream the selected columns of the image table to a file and return the number of rows written.
+
+    By default all columns of the image schema are exported. The float16 vector copies are left out,
+    imports into a table that has them derive them again.
+    """
+    fmt = fmt or FileFormat.from_path(path)
+    dataset = TBL.to_lance()
+    if unknown := unknown_columns(columns or ()):
+        msg = f"Unknown columns {', '.join(unknown)}, the table has {', '.join(dataset.schema.names)}"
+        raise ValueError(msg)
+    schema = pa.schema([dataset.schema.field(column) for column in columns or SCHEMA.names])
+    batches = dataset.to_batches(columns=schema.names, batch_size=batch_size)
+    rows = 0
+    if fmt == FileFormat.PARQUET:
+        with pq.ParquetWriter(path, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    elif fmt == FileFormat.ARROW:
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    elif fmt == FileFormat.NDJSON:
+        with path.open("w", encoding="utf-8") as file:
+            for batch in batches:
+                for row in batch.to_pylist():
+                    file.write(json.dumps(row, default=_json_default) + "\n")
+                rows += batch.num_rows
+    else:
+        msg = f"Cannot export to {fmt}, use parquet, arrow or ndjson"
+        raise ValueError(msg)
+    logger.info("Exported %d rows to %s", rows, path)
+    return rows
+
+
+def read_batches(
+    path: Path, fmt: FileFormat | None = None, batch_size: int = cfg.transfer_batch_size
+) -> Iterator[pa.RecordBatch]:
+    """Read an exported file in record batches."""
+    fmt = fmt or FileFormat.from_path(path)
+    if fmt == FileFormat.PARQUET:
+        yield from pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+    elif fmt == FileFormat.ARROW:
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index)
+    elif fmt == FileFormat.NDJSON:
+        with path.open(encoding="utf-8") as file:
+            for lines in batched((line for line in file if line.strip()), batch_size):
+                yield pa.RecordBatch.from_pylist([json.loads(line) for line in lines])
+    else:
+        # The pandas layout maps each column to {row index: value}, so it can only be read whole
+        with path.open(encoding="utf-8") as file:
+            data: dict[str, dict[str, Any]] = json.load(file)
+        columns = {column: list(values.values()) for column, values in data.items()}
+        for column in (FIELD.created, FIELD.updated):
+            if column in columns:
+                columns[column] = [
+                    v * _LEGACY_TIMESTAMP_SCALE if isinstance(v, int) and v < _LEGACY_TIMESTAMP_MAX else v
+                    for v in columns[column]
+                ]
+        rows = len(next(iter(columns.values()), []))
+        for start in range(0, rows, batch_size):
+            yield pa.RecordBatch.from_pydict(
+                {column: values[start : start + batch_size] for column, values in columns.items()}
+            )
+
+
+def _digests(names: Sequence[str]) -> list[str | None]:
+    paths = [cfg.image_path / name for name in names]
+    return [file_digest(path) if path.is_file() else None for path in paths]
+
+
+def conform(batch: pa.RecordBatch, now: datetime | None = None) -> pa.Table:
+    """Cast an imported batch to the table schema, filling in missing timestamps and digests.
+
+    Missing digests are computed from the image files already in the image folder, and stay null otherwise.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in batch.schema.names]
+    if missing:
+        msg = f"Imported rows lack the columns {', '.join(missing)}"
+        raise ValueError(msg)
+    now = now or datetime.now()
+    arrays = []
+    for field in SCHEMA:
+        if field.name == FIELD.digest and field.name not in batch.schema.names:
+            arrays.append(pa.array(_digests(batch.column(FIELD.name).to_pylist()), field.type))
+            continue
+        if field.name not in batch.schema.names:
+            value = now if pa.types.is_timestamp(field.type) else None
+            arrays.append(pa.array([value] * batch.num_rows, field.type))
+            continue
+        column = batch.column(field.name)
+        if pa.types.is_timestamp(field.type) and pa.types.is_string(column.type):
+            column = column.cast(pa.timestamp("us")).cast(field.type)
+        try:
+            arrays.append(column.cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            msg = f"Cannot load column {field.name} as {field.type}: {e}"
+            raise ValueError(msg) from e
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+
+def import_table(
+    path: Path,
+    fmt: FileFormat | None = None,
+    batch_size: int = cfg.transfer_batch_size,
+    replace: bool = False,
+    upsert: bool = False,
+) -> tuple[int, int]:
+    """Bulk load an exported file into the image table in batches.
+
+    Rows whose name is already stored are skipped, or overwritten with one merge_insert per batch
+    when ``upsert`` is set. ``replace`` empties the table first. Returns the number of rows written and skipped.
+    """
+    start = time.perf_counter()
+    if replace:
+        TBL.delete("true")
+    stored = set() if upsert else set(TBL.to_lance().to_table(columns=[FIELD.name]).column(FIELD.name).to_pylist())
+    added = skipped = 0
+    compact = has_compact_vectors()
+    for batch in read_batches(path, fmt, batch_size):
+        table = conform(batch)
+        if compact:
+            table = with_compact_vectors(table)
+        if upsert:
+            TBL.merge_insert(FIELD.name).when_matched_update_all().when_not_matched_insert_all().execute(table)
+            added += table.num_rows
+            continue
+        names = table.column(FIELD.name).to_pylist()
+        keep = [name not in stored for name in names]
+        if not all(keep):
+            table = table.filter(pa.array(keep))
+        skipped += len(names) - table.num_rows
+        if table.num_rows:
+            TBL.add(table)
+            stored.update(table.column(FIELD.name).to_pylist())
+            added += table.num_rows
+    ensure_digest_index()
+    ensure_fts_index()
+    rebuild_stale_indexes()
+    logger.info("Imported %d rows from %s in %.2fs, skipped %d", added, path, time.perf_counter() - start, skipped)
+    return added, skipped
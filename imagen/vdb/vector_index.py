@@ -0,0 +1,123 @@
+"""ANN vector index management for the image table."""
+
+import math
+from enum import StrEnum
+from typing import Any
+
+import pyarrow as pa
+
+from imagen.config import cfg
+from imagen.log import logger
+from imagen.model.image import FIELD
+from imagen.vdb.lancedb_persistence import (
+    DISTANCE,
+    TBL,
+    ensure_fts_index,
+    has_compact_vectors,
+)
+
+VECTOR_COLUMNS = (FIELD.image_vector, FIELD.text_vector)
+
+
+def vector_columns() -> list[str]:
+    """The vector columns to index, including the float16 copies when the table has them."""
+    columns = list(VECTOR_COLUMNS)
+    if has_compact_vectors():
+        columns += [FIELD.compact(column) for column in VECTOR_COLUMNS]
+    return columns
+
+
+class IndexType(StrEnum):
+    IVF_PQ = "IVF_PQ"
+    IVF_HNSW_PQ = "IVF_HNSW_PQ"
+    IVF_HNSW_SQ = "IVF_HNSW_SQ"
+
+
+def _index_for(column: str) -> dict | None:
+    return next((index for index in TBL.to_lance().list_indices() if column in index["fields"]), None)
+
+
+def _num_partitions(rows: int) -> int:
+    """Use about sqrt(rows) partitions, the usual IVF starting point."""
+    return max(1, min(4096, int(math.sqrt(rows))))
+
+
+def _num_sub_vectors(dimension: int) -> int:
+    """Use 16 dimensions per PQ sub-vector when the dimension allows it."""
+    return dimension // 16 if dimension % 16 == 0 else dimension // 8
+
+
+def build_vector_index(
+    column: str,
+    metric: str = cfg.vector_index_metric,
+    index_type: str = cfg.vector_index_type,
+) -> bool:
+    """Build or rebuild the ANN index on a vector column.
+
+    Lance keeps one index per column, so the metric is chosen per build. Returns False when
+    the table is too small to train an index. Float16 columns always get IVF_PQ, since Lance
+    cannot build the HNSW index types on them.
+    """
+    rows = TBL.count_rows()
+    if rows < cfg.vector_index_min_rows:
+        logger.info("Skipping %s index: %d rows is below %d", column, rows, cfg.vector_index_min_rows)
+        return False
+    vector_type = TBL.schema.field(column).type
+    if pa.types.is_float16(vector_type.value_type) and index_type != IndexType.IVF_PQ:
+        logger.info("Using %s instead of %s for the float16 column %s", IndexType.IVF_PQ, index_type, column)
+        index_type = IndexType.IVF_PQ
+    dimension = vector_type.list_size
+    logger.info("Building %s index on %s with %s metric over %d rows", index_type, column, metric, rows)
+    TBL.create_index(
+        metric=DISTANCE(metric).value,
+        num_partitions=_num_partitions(rows),
+        num_sub_vectors=_num_sub_vectors(dimension),
+        vector_column_name=column,
+        replace=True,
+        index_type=IndexType(index_type).value,
+    )
+    return True
+
+
+def build_vector_indexes(
+    metric: str = cfg.vector_index_metric,
+    index_type: str = cfg.vector_index_type,
+) -> list[str]:
+    """Build or rebuild the ANN indexes on the vector columns."""
+    return [column for column in vector_columns() if build_vector_index(column, metric, index_type)]
+
+
+def vector_index_info() -> list[dict[str, Any]]:
+    """Describe the ANN index of each vector column."""
+    dataset = TBL.to_lance()
+    info = []
+    for column in vector_columns():
+        if (index := _index_for(column)) is None:
+            info.append({"column": column, "index": None, "unindexed_rows": TBL.count_rows()})
+            continue
+        stats = dataset.stats.index_stats(index["name"])
+        info.append(
+            {
+                "column": column,
+                "index": index["name"],
+                "index_type": stats["index_type"],
+                "metric": stats["indices"][0].get("metric_type"),
+                "partitions": stats["indices"][0].get("num_partitions"),
+                "indexed_rows": stats["num_indexed_rows"],
+                "unindexed_rows": stats["num_unindexed_rows"],
+            }
+        )
+    return info
+
+
+def rebuild_stale_indexes() -> list[str]:
+    """Rebuild indexes, including the full-text one, that are missing or whose unindexed rows passed the threshold."""
+    rebuilt = []
+    for info in vector_index_info():
+        if info["index"] is None or info["unindexed_rows"] >= cfg.vector_index_rebuild_rows:
+            metric = info.get("metric") or cfg.vector_index_metric
+            if build_vector_index(info["column"], metric, info.get("index_type") or cfg.vector_index_type):
+                rebuilt.append(info["column"])
+    if ensure_fts_index(cfg.fts_index_rebuild_rows):
+        rebuilt.append(FIELD.description)
+    return rebuilt
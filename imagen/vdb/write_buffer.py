@@ -0,0 +1,127 @@
+"""Buffered bulk writes to LanceDB."""
+
+import asyncio as aio
+import threading
+import time
+from collections.abc import Callable
+from types import TracebackType
+from typing import Any, Self
+
+from imagen.config import cfg
+from imagen.log import logger
+from imagen.model.image import Image
+from imagen.vdb.lancedb_persistence import (
+    LANCE_ERRORS,
+    TBL,
+    ensure_digest_index,
+    ensure_fts_index,
+    to_table_rows,
+)
+from imagen.vdb.vector_index import rebuild_stale_indexes
+
+
+class WriteBuffer:
+    """Collect image rows and write them to LanceDB as one Arrow table per flush.
+
+    Every write creates a new Lance fragment and table version, so rows are held until
+    ``max_rows`` are pending or the oldest row has waited ``max_seconds``. Both limits are
+    checked when a row is added, and the rows after the last add stay buffered until ``flush``
+    is called or the context exits. With ``background`` set, ``add`` only queues rows and
+    ``run_flusher`` does all writes, so adding never blocks an event loop on LanceDB.
+    ``on_flush`` is called with the rows of every successful write.
+    """
+
+    def __init__(
+        self,
+        max_rows: int | None = None,
+        max_seconds: float | None = None,
+        on_flush: Callable[[list[Image]], Any] | None = None,
+        background: bool = False,
+    ) -> None:
+        self.max_rows = max_rows or cfg.write_buffer_rows
+        self.max_seconds = max_seconds or cfg.write_buffer_seconds
+        self.on_flush = on_flush
+        self.background = background
+        self._rows: list[Image] = []
+        self._pending: dict[str, Image] = {}
+        self._oldest: float | None = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.flush()
+
+    def add(self, image: Image) -> None:
+        """Queue an image row, flushing if the buffer is full or its oldest row is due and no flusher runs."""
+        with self._lock:
+            self._rows.append(image)
+            if image.digest:
+                self._pending[image.digest] = image
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = self.due
+        if due and not self.background:
+            self.flush()
+
+    def pending(self, digest: str) -> Image | None:
+        """Return a buffered image with the given content digest."""
+        return self._pending.get(digest)
+
+    @property
+    def due(self) -> bool:
+        """Whether the buffer is full or the oldest pending row has waited long enough to be written."""
+        if len(self._rows) >= self.max_rows:
+            return True
+        return self._oldest is not None and time.monotonic() - self._oldest >= self.max_seconds
+
+    def flush(self) -> int:
+        """Write all pending rows and return how many were written."""
+        with self._write_lock:
+            with self._lock:
+                rows, self._rows, self._oldest = self._rows, [], None
+            if not rows:
+                return 0
+            try:
+                TBL.add(to_table_rows(rows))
+            except Exception:
+                # Keep the rows so the next flush can retry them
+                with self._lock:
+                    self._rows[:0] = rows
+                    self._oldest = self._oldest or time.monotonic()
+                raise
+            with self._lock:
+                for row in rows:
+                    if row.digest:
+                        self._pending.pop(row.digest, None)
+            if self.on_flush is not None:
+                self.on_flush(rows)
+        logger.info("Flushed %d rows to %s", len(rows), cfg.lance_table_image)
+        ensure_digest_index()
+        ensure_fts_index()
+        return len(rows)
+
+    async def run_flusher(self, interval: float | None = None) -> None:
+        """Flush in the background whenever rows are due. Run this as a task.
+
+        Vector indexes that fell too far behind are rebuilt after each flush.
+        """
+        interval = interval or min(self.max_seconds, 1.0)
+        while True:
+            await aio.sleep(interval)
+            if self.due:
+                try:
+                    await aio.to_thread(self.flush)
+                    await aio.to_thread(rebuild_stale_indexes)
+                except LANCE_ERRORS:
+                    logger.exception("Background flush failed")
@@ -17,7 +17,9 @@ from imagen.server.main import app  # noqa: E402
 
 async def clear_database() -> None:
     """Empty the test database."""
-    # delete temp database here
+    from imagen.vdb.lancedb_persistence import TBL
+
+    TBL.delete("true")
 
 
 @pytest_asyncio.fixture()
@@ -28,4 +30,4 @@ async def client() -> AsyncIterator[AsyncClient]:
             try:
                 yield _client
             finally:
-                await clear_database(app)
+                await clear_database()
@@ -0,0 +1,18 @@
+"""Test data helpers."""
+
+import numpy as np
+
+from imagen.model.image import Image
+
+
+def make_image(name: str, description: str = "", digest: str | None = None, seed: int = 0) -> Image:
+    """Build an image row with random unit vectors."""
+    rng = np.random.default_rng(seed)
+    image_vector, text_vector = rng.normal(size=(2, 768)).astype(np.float32)
+    return Image(
+        name,
+        description,
+        image_vector / np.linalg.norm(image_vector),
+        text_vector / np.linalg.norm(text_vector),
+        digest=digest or name,
+    )
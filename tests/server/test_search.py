@@ -0,0 +1,70 @@
+from collections.abc import Sequence
+
+import pytest
+from httpx import AsyncClient
+
+from imagen.config import cfg
+from imagen.vdb.lancedb_persistence import TBL, to_table_rows
+from tests.data import make_image
+
+IMAGES = [make_image(f"{color}.png", f"a {color} square", seed=i) for i, color in enumerate(("red", "green", "blue"))]
+
+
+def vectors(field: str) -> dict[str, list[float]]:
+    return {image.description: getattr(image, field).tolist() for image in IMAGES}
+
+
+@pytest.fixture(autouse=True)
+def images(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Store the test images and embed queries with the vector of the image they describe."""
+
+    async def startup(readiness: object) -> None:
+        pass
+
+    def embed(field: str):
+        async def embed_batch(texts: Sequence[str]) -> list[list[float]]:
+            return [vectors(field)[text] for text in texts]
+
+        return embed_batch
+
+    # The searches need neither the CLIP model nor the embedding service
+    monkeypatch.setattr("imagen.server.app.startup", startup)
+    monkeypatch.setattr("imagen.vdb.text_search.query_embeddings_batch", embed("text_embedding"))
+    monkeypatch.setattr("imagen.vdb.text_search.query_clip_text_embeddings_batch", embed("image_embedding"))
+    TBL.delete("true")
+    TBL.add(to_table_rows(IMAGES))
+
+
+def names(results: list[dict]) -> list[str]:
+    return [result["name"] for result in results]
+
+
+@pytest.mark.asyncio
+async def test_search_batch(client: AsyncClient) -> None:
+    searches = ["a blue square", "a red square", "a blue square"]
+    response = await client.post("/search/batch", json={"searches": searches, "limit": 2})
+    assert response.status_code == 200
+    groups = response.json()
+    assert [group["search"] for group in groups] == searches
+    assert [names(group["results"])[0] for group in groups] == ["blue.png", "red.png", "blue.png"]
+    assert all(len(group["results"]) == 2 for group in groups)
+    assert groups[0]["results"][0]["distance"] == pytest.approx(0, abs=1e-4)
+    assert groups[0]["results"][0]["thumbnail_url"].startswith("/image/blue.png?w=")
+
+
+@pytest.mark.asyncio
+async def test_search_batch_clip(client: AsyncClient) -> None:
+    response = await client.post("/search/batch", json={"searches": ["a green square"], "mode": "clip"})
+    assert response.status_code == 200
+    assert names(response.json()[0]["results"])[0] == "green.png"
+    assert len(response.json()[0]["results"]) == len(IMAGES)
+
+
+@pytest.mark.asyncio
+async def test_search_batch_limits(client: AsyncClient) -> None:
+    assert (await client.post("/search/batch", json={"searches": []})).status_code == 422
+    searches = ["a red square"] * (cfg.search_batch_max_queries + 1)
+    assert (await client.post("/search/batch", json={"searches": searches})).status_code == 422
+    assert (
+        await client.post("/search/batch", json={"searches": ["a red square"], "mode": "pixels"})
+    ).status_code == 422
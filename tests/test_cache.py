@@ -0,0 +1,34 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from imagen.service.cache import EmbeddingCache, normalize_query
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_memory_lru(self):
+        cache = EmbeddingCache("test_memory", max_entries=2, disk_path=None)
+        cache.put("a", [1.0])
+        cache.put("b", [2.0])
+        assert cache.get("a") == [1.0]
+        cache.put("c", [3.0])
+        assert cache.get("b") is None
+        assert cache.get("c") == [3.0]
+        assert cache.stats.memory_hits == 2
+        assert cache.stats.misses == 1
+        assert cache.stats.evictions == 1
+
+    def test_disk_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cache.sqlite"
+            EmbeddingCache("test_disk", disk_path=path).put("a", [0.5, 0.25])
+            cache = EmbeddingCache("test_disk", disk_path=path)
+            assert cache.get("a") == [0.5, 0.25]
+            assert cache.stats.disk_hits == 1
+
+    def test_normalize_query(self):
+        assert normalize_query("  Young   WOMAN ") == "young woman"
+
+
+if __name__ == "__main__":
+    unittest.main()
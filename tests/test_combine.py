@@ -0,0 +1,25 @@
+import unittest
+
+from imagen.model.image import Image
+from imagen.utils.combine import reciprocal_rank_fusion
+
+
+def _image(name: str, distance: float | None = None) -> Image:
+    return Image(name, "", [], [], distance=distance)
+
+
+class TestReciprocalRankFusion(unittest.TestCase):
+    def test_shared_hits_rank_first(self):
+        vector = [_image("a", 0.1), _image("b", 0.2), _image("c", 0.3)]
+        keyword = [_image("c"), _image("d")]
+        fused = reciprocal_rank_fusion([vector, keyword], [1.0, 1.0], limit=3, k=60)
+        assert [image.name for image in fused] == ["c", "a", "b"]
+        assert fused[0].score == 1 / 63 + 1 / 61
+        assert fused[0].distance == 0.3
+
+    def test_weights(self):
+        fused = reciprocal_rank_fusion([[_image("a")], [_image("b")]], [1.0, 2.0], limit=2)
+        assert [image.name for image in fused] == ["b", "a"]
+
+    def test_empty(self):
+        assert reciprocal_rank_fusion([[], []], [1.0, 1.0], limit=5) == []
@@ -0,0 +1,76 @@
+import asyncio as aio
+import threading
+import unittest
+from unittest.mock import patch
+
+from imagen.service.image.executor import (
+    InferenceBatcher,
+    InferenceQueueFull,
+    run_inference,
+)
+
+
+class Doubler:
+    """Batched model stand-in that records the batches it receives."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[int]] = []
+        self.threads: set[str] = set()
+
+    def __call__(self, items: list[int]) -> list[int]:
+        self.batches.append(items)
+        self.threads.add(threading.current_thread().name)
+        if -1 in items:
+            msg = "bad input"
+            raise ValueError(msg)
+        return [item * 2 for item in items]
+
+
+class TestInferenceBatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_coalesce(self):
+        model = Doubler()
+        batcher = InferenceBatcher(model, max_size=10, max_wait=0.05)
+        assert await aio.gather(*(batcher(i) for i in range(5))) == [0, 2, 4, 6, 8]
+        assert model.batches == [[0, 1, 2, 3, 4]]
+        # The model runs in the inference pool, not on the event loop
+        assert threading.current_thread().name not in model.threads
+
+    async def test_max_size(self):
+        model = Doubler()
+        batcher = InferenceBatcher(model, max_size=2, max_wait=60)
+        results = await aio.wait_for(aio.gather(*(batcher(i) for i in range(4))), 5)
+        assert results == [0, 2, 4, 6]
+        assert model.batches == [[0, 1], [2, 3]]
+        assert not batcher._tasks
+
+    async def test_max_wait(self):
+        model = Doubler()
+        batcher = InferenceBatcher(model, max_size=10, max_wait=0.01)
+        assert await batcher(1) == 2
+        assert await batcher(2) == 4
+        assert model.batches == [[1], [2]]
+
+    async def test_errors(self):
+        batcher = InferenceBatcher(Doubler(), max_size=3, max_wait=0.05)
+        results = await aio.gather(batcher(1), batcher(-1), batcher(3), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        # The batcher keeps working after a failed batch
+        assert await batcher(4) == 8
+
+    async def test_queue_full(self):
+        with patch("imagen.service.image.executor._slots", threading.BoundedSemaphore(1)) as slots:
+            slots.acquire()
+            with self.assertRaises(InferenceQueueFull):
+                await run_inference(sum, [1, 2])
+            slots.release()
+            assert await run_inference(sum, [1, 2]) == 3
+
+
+class TestInferenceBatcherLoops(unittest.TestCase):
+    def test_separate_loops(self):
+        # Streamlit runs every call in a fresh event loop
+        model = Doubler()
+        batcher = InferenceBatcher(model, max_size=10, max_wait=0.01)
+        for i in range(3):
+            assert aio.run(batcher(i)) == i * 2
+        assert model.batches == [[0], [1], [2]]
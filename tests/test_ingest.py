@@ -0,0 +1,114 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import aiohttp
+import numpy as np
+from PIL import Image as PILImage
+
+from imagen.config import cfg
+from imagen.model.image import Image
+from imagen.service.ingest import IngestPipeline
+from imagen.utils.file_utils import file_digest
+
+
+class IngestTestCase(unittest.IsolatedAsyncioTestCase):
+    """Source images in a temporary folder, a temporary image store and fake model calls."""
+
+    colors = ("red", "green", "blue", "bad")
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._image_path = cfg.image_path
+        root = Path(self._tmp.name)
+        cfg.image_path = root / "images"
+        cfg.image_path.mkdir()
+        (root / "source").mkdir()
+        self.sources = []
+        for i, color in enumerate(self.colors):
+            path = root / "source" / f"{color}.png"
+            PILImage.new("RGB", (8 + i, 8), "black" if color == "bad" else color).save(path)
+            self.sources.append(path)
+        self.saved: list[Image] = []
+        self.described: list[str] = []
+        self.clip_calls: list[list[str]] = []
+        for target, fake in (
+            ("describe", self.describe),
+            ("run_inference", self.run_inference),
+            ("text_embeddings_batch", self.text_embeddings_batch),
+        ):
+            patcher = patch(f"imagen.service.ingest.{target}", fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cfg.image_path = self._image_path
+        self._tmp.cleanup()
+
+    async def describe(self, path: Path) -> str:
+        self.described.append(path.name)
+        return f"a {path.name.split('_', 1)[1].removesuffix('.png')} square"
+
+    async def run_inference(self, func, paths: list[Path]) -> np.ndarray:
+        self.clip_calls.append([path.stem for path in paths])
+        if "bad" in self.clip_calls[-1]:
+            msg = "cannot identify image file"
+            raise OSError(msg)
+        return np.ones((len(paths), 768), np.float32)
+
+    async def text_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
+        return [[0.5] * 768 for _ in texts]
+
+    def sink(self, image: Image) -> None:
+        self.saved.append(image)
+
+    def pipeline(self, **kwargs) -> IngestPipeline:
+        return IngestPipeline(self.sink, batch_size=4, describe_workers=2, text_workers=2, **kwargs)
+
+
+class TestIngestPipeline(IngestTestCase):
+    async def test_batch_retry(self):
+        pipeline = self.pipeline()
+        assert await pipeline.run(self.sources) == 3
+        # The batch with the broken image is retried item by item
+        assert sorted(self.clip_calls[0]) == sorted(self.colors)
+        assert sorted(call[0] for call in self.clip_calls[1:]) == sorted(self.colors)
+        assert (pipeline.stats["clip"].processed, pipeline.stats["clip"].failed) == (3, 1)
+        assert sorted(image.description for image in self.saved) == ["a blue square", "a green square", "a red square"]
+        for image in self.saved:
+            assert image.image_path is not None and image.image_path.parent == cfg.image_path
+            assert image.digest == file_digest(image.image_path)
+            assert image.text_embedding.dtype == np.float32 and len(image.text_embedding) == 768
+
+    async def test_stage_failure_isolation(self):
+        async def describe(path: Path) -> str:
+            if "green" in path.name:
+                msg = "llava is down"
+                raise aiohttp.ClientError(msg)
+            return "" if "blue" in path.name else "a square"
+
+        pipeline = self.pipeline()
+        with patch("imagen.service.ingest.describe", describe):
+            assert await pipeline.run(self.sources[:3]) == 1
+        assert pipeline.stats["describe"].failed == 2
+        assert [image.name.endswith("red.png") for image in self.saved] == [True]
+
+    async def test_unexpected_errors_stop(self):
+        def sink(image: Image) -> None:
+            raise AssertionError
+
+        pipeline = IngestPipeline(sink)
+        with self.assertRaises(Exception) as raised:
+            await pipeline.run(self.sources[:1])
+        # The task group wraps the error
+        assert [type(error) for error in raised.exception.exceptions] == [AssertionError]
+
+    async def test_skip_existing_digests(self):
+        stored = {file_digest(self.sources[0]), file_digest(self.sources[1])}
+        pipeline = self.pipeline(exists=stored.__contains__)
+        assert await pipeline.run(self.sources[:3]) == 1
+        assert pipeline.stats["copy"].skipped == 2
+        # Skipped files are neither copied nor described
+        assert [path.name.endswith("blue.png") for path in cfg.image_path.iterdir()] == [True]
+        assert len(self.described) == 1
@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+from imagen.config import cfg
+from imagen.model.image import Image
+from imagen.service.ingest import IngestPipeline
+from imagen.service.manifest import IngestManifest, IngestStatus
+from tests.test_ingest import IngestTestCase
+
+
+class TestIngestManifest(IngestTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest = IngestManifest(Path(self._tmp.name) / "manifest.sqlite")
+        self.addCleanup(self.manifest.close)
+
+    def test_record(self):
+        source = self.sources[0]
+        self.manifest.record(source, IngestStatus.PENDING, digest="abc", stored_name="x_red.png")
+        assert not self.manifest.is_done(source)
+        self.manifest.record(source, IngestStatus.DONE)
+        entry = self.manifest.get(source)
+        assert entry is not None
+        assert (entry.digest, entry.stored_name, entry.status) == ("abc", "x_red.png", IngestStatus.DONE)
+        assert self.manifest.is_done(source)
+        # A changed file has to be ingested again
+        stat = source.stat()
+        os.utime(source, (stat.st_atime, stat.st_mtime + 10))
+        assert not self.manifest.is_done(source)
+
+    def test_mark_stored(self):
+        for i, source in enumerate(self.sources[:3]):
+            self.manifest.record(source, IngestStatus.PENDING, stored_name=f"{i}.png")
+        self.manifest.mark_stored(["0.png", "2.png"])
+        assert [self.manifest.is_done(source) for source in self.sources[:3]] == [True, False, True]
+        assert self.manifest.summary() == {IngestStatus.DONE: 2, IngestStatus.PENDING: 1}
+
+    async def test_failures(self):
+        await self.pipeline(manifest=self.manifest).run(self.sources)
+        entry = self.manifest.get(self.sources[3])
+        assert entry is not None and entry.status == IngestStatus.FAILED
+        assert entry.error == "clip: OSError: cannot identify image file"
+        assert self.manifest.summary() == {IngestStatus.DONE: 3, IngestStatus.FAILED: 1}
+        # Failed files are tried again on the next run
+        assert not self.manifest.is_done(self.sources[3])
+
+    async def test_resume_after_interruption(self):
+        # The sink buffers rows, and only the first buffered row reaches the database before the crash
+        def buffered(image: Image) -> bool:
+            self.saved.append(image)
+            return True
+
+        first = IngestManifest(self.manifest.path)
+        pipeline = IngestPipeline(buffered, manifest=first, batch_size=4)
+        assert await pipeline.run(self.sources[:3]) == 3
+        first.mark_stored([self.saved[0].name])
+        first.close()
+        copies = sorted(path.name for path in cfg.image_path.iterdir())
+        assert self.manifest.summary() == {IngestStatus.DONE: 1, IngestStatus.PENDING: 2}
+
+        self.saved.clear()
+        self.described.clear()
+        pipeline = self.pipeline(manifest=self.manifest)
+        assert await pipeline.run(self.sources[:3]) == 2
+        assert pipeline.stats["copy"].skipped == 1
+        assert len(self.described) == 2
+        # The copies of the unfinished files are reused, not copied again
+        assert sorted(path.name for path in cfg.image_path.iterdir()) == copies
+        assert all(self.manifest.is_done(source) for source in self.sources[:3])
+        assert self.manifest.summary() == {IngestStatus.DONE: 3}
@@ -0,0 +1,35 @@
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from imagen.config import cfg
+from imagen.service.image.thumbnail import get_thumbnail
+
+
+class TestThumbnail(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._thumbnail_path = cfg.thumbnail_path
+        cfg.thumbnail_path = Path(self._tmp.name) / "thumbnails"
+        self.image = Path(self._tmp.name) / "red.png"
+        Image.new("RGB", (400, 300), "red").save(self.image)
+
+    def tearDown(self):
+        cfg.thumbnail_path = self._thumbnail_path
+        self._tmp.cleanup()
+
+    def test_concurrent_writers(self):
+        for _ in range(5):
+            for path in cfg.thumbnail_path.rglob("*"):
+                if path.is_file():
+                    path.unlink()
+            with ThreadPoolExecutor(8) as pool:
+                paths = list(pool.map(lambda _: get_thumbnail(self.image, 100), range(8)))
+            assert len(set(paths)) == 1
+            assert paths[0].exists()
+            assert [path.name for path in paths[0].parent.iterdir()] == [paths[0].name]
+        with Image.open(paths[0]) as thumbnail:
+            assert thumbnail.width <= 400
@@ -0,0 +1,23 @@
+import unittest
+
+import numpy as np
+import pyarrow as pa
+
+from imagen.model.image import FIELD, Image, with_compact_vectors
+from imagen.vdb.lancedb_persistence import DISTANCE, exact_distances
+
+
+class TestCompactVectors(unittest.TestCase):
+    def test_float16_copies(self):
+        image = Image("a.png", "", np.full(768, 0.1), np.full(768, 0.2))
+        table = with_compact_vectors(Image.batch_to_pyarrow([image]))
+        column = table.column(FIELD.compact(FIELD.image_vector))
+        assert column.type == pa.list_(pa.float16(), 768)
+        assert np.allclose(column[0].values.to_numpy(), 0.1, atol=1e-3)
+
+    def test_exact_distances(self):
+        vectors = np.array([[1.0, 0.0], [0.0, 2.0]], dtype=np.float32)
+        query = np.array([1.0, 1.0], dtype=np.float32)
+        assert exact_distances(vectors, query).tolist() == [1.0, 2.0]
+        assert np.allclose(exact_distances(vectors, query, DISTANCE.COSINE), 1 - np.sqrt(0.5))
+        assert exact_distances(vectors, query, DISTANCE.DOT).tolist() == [-1.0, -2.0]
@@ -0,0 +1,65 @@
+import unittest
+
+import pyarrow as pa
+
+from imagen.model.image import FIELD
+from imagen.vdb.lancedb_info import SortField, get_data, get_page
+from imagen.vdb.lancedb_persistence import TBL, to_table_rows
+from tests.data import make_image
+
+START = 1_700_000_000_000
+
+
+def names(table: pa.Table) -> list[str]:
+    return table.column(FIELD.name).to_pylist()
+
+
+class TestGetPage(unittest.TestCase):
+    def setUp(self):
+        TBL.delete("true")
+        # Inserted out of creation order, in two fragments
+        images = [make_image(f"{i}.png", seed=i) for i in (3, 0, 4, 1, 5, 2, 7, 6, 9, 8)]
+        for image in images:
+            image.created = START + int(image.name.removesuffix(".png")) * 1000
+        TBL.add(to_table_rows(images[:5]))
+        TBL.add(to_table_rows(images[5:]))
+
+    def tearDown(self):
+        TBL.delete("true")
+
+    def pages(self, size: int, **kwargs) -> list[str]:
+        found = []
+        offset = 0
+        while len(page := get_page(offset, size, **kwargs)):
+            found += names(page)
+            offset += size
+        return found
+
+    def test_sorted(self):
+        assert names(get_page(0, 3, SortField.CREATED)) == ["9.png", "8.png", "7.png"]
+        assert names(get_page(3, 3, SortField.CREATED, descending=False)) == ["3.png", "4.png", "5.png"]
+        assert self.pages(4, sort=SortField.CREATED) == [f"{i}.png" for i in range(9, -1, -1)]
+
+    def test_sorted_with_deletions(self):
+        TBL.delete(f"{FIELD.name} IN ('8.png', '2.png', '3.png')")
+        assert names(get_page(0, 3, SortField.CREATED)) == ["9.png", "7.png", "6.png"]
+        assert self.pages(3, sort=SortField.CREATED, descending=False) == [f"{i}.png" for i in (0, 1, 4, 5, 6, 7, 9)]
+
+    def test_new_version(self):
+        get_page(0, 3, SortField.CREATED)
+        image = make_image("10.png", seed=10)
+        image.created = START + 10_000
+        TBL.add(to_table_rows([image]))
+        # The sorted ids are cached per table version, so the new row shows up at once
+        assert names(get_page(0, 2, SortField.CREATED)) == ["10.png", "9.png"]
+
+    def test_unsorted(self):
+        assert len(self.pages(3)) == 10
+        assert sorted(self.pages(3)) == sorted(f"{i}.png" for i in range(10))
+
+    def test_columns_and_end(self):
+        page = get_page(0, 2, SortField.UPDATED, columns=[FIELD.name, FIELD.created])
+        assert page.column_names == [FIELD.name, FIELD.created]
+        assert get_page(20, 5, SortField.CREATED).num_rows == 0
+        assert get_page(20, 5).num_rows == 0
+        assert list(get_data(0, 3, SortField.CREATED).columns) == list(FIELD.info)
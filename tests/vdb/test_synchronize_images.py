@@ -0,0 +1,90 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from imagen.config import cfg
+from imagen.vdb.lancedb_persistence import TBL, to_table_rows
+from imagen.vdb.synchronize_images import delete_rows, stored_names, syncronize_db
+from tests.data import make_image
+
+
+class TestSynchronizeImages(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._image_path = cfg.image_path
+        self._grace = cfg.sync_grace_seconds
+        cfg.image_path = Path(self._tmp.name)
+        cfg.sync_grace_seconds = 60
+        TBL.delete("true")
+        # Two images with rows and files, one row without a file and one old file without a row
+        TBL.add(to_table_rows([make_image(name, seed=i) for i, name in enumerate(("a.png", "b.png", "gone.png"))]))
+        for name in ("a.png", "b.png", "orphan.png"):
+            self.write_file(name, age=3600)
+
+    def tearDown(self):
+        TBL.delete("true")
+        cfg.image_path = self._image_path
+        cfg.sync_grace_seconds = self._grace
+        self._tmp.cleanup()
+
+    def write_file(self, name: str, age: float = 0) -> Path:
+        path = cfg.image_path / name
+        path.write_bytes(b"png")
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_synchronize(self):
+        report = syncronize_db()
+        assert report.orphan_files == ["orphan.png"]
+        assert report.missing_files == ["gone.png"]
+        assert (report.files_removed, report.rows_deleted) == (1, 1)
+        assert sorted(path.name for path in cfg.image_path.iterdir()) == ["a.png", "b.png"]
+        assert stored_names() == {"a.png", "b.png"}
+
+    def test_dry_run(self):
+        report = syncronize_db(dry_run=True)
+        assert report.orphan_files == ["orphan.png"]
+        assert report.missing_files == ["gone.png"]
+        assert (report.files_removed, report.rows_deleted) == (0, 0)
+        assert (cfg.image_path / "orphan.png").exists()
+        assert stored_names() == {"a.png", "b.png", "gone.png"}
+
+    def test_grace_period(self):
+        self.write_file("new.png", age=10)
+        report = syncronize_db()
+        assert "new.png" not in report.orphan_files
+        assert (cfg.image_path / "new.png").exists()
+        cfg.sync_grace_seconds = 5
+        assert syncronize_db(dry_run=True).orphan_files == ["new.png"]
+
+    def test_files_being_ingested(self):
+        # A copied upload whose row is still buffered, and one that is being written right now
+        self.write_file("buffered.png")
+        with (cfg.image_path / "partial.png").open("wb") as partial:
+            partial.write(b"p")
+            report = syncronize_db()
+        assert report.orphan_files == ["orphan.png"]
+        assert (cfg.image_path / "buffered.png").exists()
+        assert (cfg.image_path / "partial.png").exists()
+        # Once the row lands the file is in sync
+        TBL.add(to_table_rows([make_image("buffered.png", seed=9)]))
+        assert "buffered.png" not in syncronize_db(dry_run=True).orphan_files
+
+    def test_only_files_or_rows(self):
+        report = syncronize_db(files=False)
+        assert (report.orphan_files, report.missing_files) == ([], ["gone.png"])
+        assert (cfg.image_path / "orphan.png").exists()
+        report = syncronize_db(rows=False)
+        assert (report.orphan_files, report.missing_files) == (["orphan.png"], [])
+
+    def test_batched_deletes(self):
+        names = [f"row{i}.png" for i in range(5)]
+        TBL.add(to_table_rows([make_image(name, seed=10 + i) for i, name in enumerate(names)]))
+        with patch.object(TBL, "delete", wraps=TBL.delete) as delete:
+            assert delete_rows([*names, "it's.png"], batch_size=2) == 6
+        assert delete.call_count == 3
+        assert stored_names() == {"a.png", "b.png", "gone.png"}
@@ -0,0 +1,115 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+from typer.testing import CliRunner
+
+from imagen.cli import app
+from imagen.config import cfg
+from imagen.model.image import FIELD
+from imagen.vdb.lancedb_persistence import TBL, to_table_rows
+from imagen.vdb.transfer import FileFormat, conform, export_table, import_table
+from tests.data import make_image
+
+
+def stored() -> dict[str, dict]:
+    rows = TBL.to_lance().to_table(columns=[FIELD.name, FIELD.description, FIELD.image_vector]).to_pylist()
+    return {row[FIELD.name]: row for row in rows}
+
+
+class TestTransfer(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._image_path = cfg.image_path
+        self.root = Path(self._tmp.name)
+        cfg.image_path = self.root
+        TBL.delete("true")
+        TBL.add(to_table_rows([make_image(f"{i}.png", f"image {i}", seed=i) for i in range(5)]))
+        self.original = stored()
+
+    def tearDown(self):
+        TBL.delete("true")
+        cfg.image_path = self._image_path
+        self._tmp.cleanup()
+
+    def test_round_trip(self):
+        for fmt in (FileFormat.PARQUET, FileFormat.ARROW, FileFormat.NDJSON):
+            with self.subTest(fmt=fmt):
+                path = self.root / f"export.{fmt}"
+                assert export_table(path, batch_size=2) == 5
+                assert import_table(path, batch_size=2, replace=True) == (5, 0)
+                result = stored()
+                assert result.keys() == self.original.keys()
+                for name, row in result.items():
+                    assert row[FIELD.description] == self.original[name][FIELD.description]
+                    assert np.allclose(row[FIELD.image_vector], self.original[name][FIELD.image_vector])
+
+    def test_skip_and_upsert(self):
+        path = self.root / "export.parquet"
+        export_table(path)
+        TBL.delete(f"{FIELD.name} = '0.png'")
+        TBL.update(where=f"{FIELD.name} = '1.png'", values={FIELD.description: "changed"})
+        assert import_table(path) == (1, 4)
+        assert stored()["1.png"][FIELD.description] == "changed"
+        assert import_table(path, upsert=True) == (5, 0)
+        assert stored()["1.png"][FIELD.description] == "image 1"
+        assert TBL.count_rows() == 5
+
+    def test_columns(self):
+        path = self.root / "names.ndjson"
+        assert export_table(path, columns=[FIELD.name, FIELD.description]) == 5
+        rows = [json.loads(line) for line in path.read_text().splitlines()]
+        assert rows[0].keys() == {FIELD.name, FIELD.description}
+        with self.assertRaisesRegex(ValueError, "Unknown columns nope"):
+            export_table(path, columns=[FIELD.name, "nope"])
+
+    def test_cli_export(self):
+        runner = CliRunner()
+        result = runner.invoke(app, ["export", "--path", str(self.root / "a.parquet"), "--column", "nope"])
+        assert result.exit_code == 2
+        assert "Unknown columns nope" in result.output
+        result = runner.invoke(app, ["export", "--path", str(self.root / "a.csv")])
+        assert result.exit_code == 2
+        assert not (self.root / "a.csv").exists()
+        result = runner.invoke(app, ["export", "--path", str(self.root / "a.arrow"), "--column", FIELD.name])
+        assert result.exit_code == 0
+        assert "Exported 5 rows" in result.output
+
+    def test_formats(self):
+        assert FileFormat.from_path(Path("a.jsonl")) == FileFormat.NDJSON
+        assert FileFormat.from_path(Path("a.FEATHER")) == FileFormat.ARROW
+        with self.assertRaisesRegex(ValueError, "CSV export was removed"):
+            FileFormat.from_path(Path("a.csv"))
+        with self.assertRaises(ValueError):
+            export_table(self.root / "a.json")
+
+    def test_pandas_json(self):
+        # The layout of DataFrame.to_json, with millisecond timestamps written as nanoseconds
+        vector = [0.5] * 768
+        data = {
+            FIELD.name: {"0": "a.png"},
+            FIELD.description: {"0": "legacy"},
+            FIELD.image_vector: {"0": vector},
+            FIELD.text_vector: {"0": vector},
+            FIELD.created: {"0": 1_737_691},
+        }
+        path = self.root / "image_data.json"
+        path.write_text(json.dumps(data))
+        assert import_table(path) == (1, 0)
+        row = TBL.search().where(f"{FIELD.name} = 'a.png'").limit(1).to_list()[0]
+        assert row[FIELD.created].year == 2025
+
+    def test_conform(self):
+        (self.root / "a.png").write_bytes(b"png")
+        vectors = pa.array([[0.5] * 768], pa.list_(pa.float32(), 768))
+        batch = pa.RecordBatch.from_pydict(
+            {FIELD.name: ["a.png"], FIELD.description: ["a"], FIELD.image_vector: vectors, FIELD.text_vector: vectors}
+        )
+        table = conform(batch)
+        assert table.column(FIELD.digest).to_pylist()[0] is not None
+        assert table.column(FIELD.created).null_count == 0
+        with self.assertRaisesRegex(ValueError, "lack the columns"):
+            conform(batch.drop_columns([FIELD.text_vector]))